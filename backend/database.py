@@ -1,6 +1,13 @@
 import os
-from sqlmodel import SQLModel, create_engine, Session
+import time
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
+from utils.metrics import Histogram, db_pool_size, db_pool_checked_out, db_pool_overflow, db_pool_wait, db_pool_timeouts
+from utils.query_stats import install_query_hooks
 
 # Load environment variables
 load_dotenv()
@@ -10,24 +17,130 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
-# Create engine
-engine = create_engine(DATABASE_URL, echo=True)
 
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
 
-def init_db():
+
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 30 minutes
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQL echo is for local debugging only; slow statements are logged by query hooks
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+# Time spent waiting for a pooled connection
+pool_wait_histogram = Histogram(buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0))
+pool_timeouts = 0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records checkout wait time and timeouts"""
+
+    def _do_get(self):
+        global pool_timeouts
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_timeouts += 1
+            db_pool_timeouts.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start_time
+            pool_wait_histogram.observe(elapsed)
+            db_pool_wait.observe(elapsed)
+
+
+def _engine_options(url: str) -> dict:
+    """Pool options for the given URL (SQLite keeps its default pool)"""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Create async engine
+engine = create_async_engine(ASYNC_DATABASE_URL, echo=DB_ECHO, **_engine_options(ASYNC_DATABASE_URL))
+install_query_hooks(engine.sync_engine)
+
+# Objects stay readable after commit so handlers never trigger lazy IO
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def init_db():
     """Initialize database tables from SQLModel metadata"""
     # Import models to register them
     from models.user import User
     from models.workspace import Workspace, WorkspaceMember
+    from models.usage import UsageCounter
+    from models.archive import ArchivedPayload
     from tools.trend_agent.models import TrendSuggestion, TrendCategory
     from tools.seo_strategist.models import SEOAnalysis
     from tools.adcreative.models import AdCreativeAnalysis
 
     # Create all tables
-    SQLModel.metadata.create_all(engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+
+async def get_session():
+    """Get async database session"""
+    async with async_session() as session:
+        yield session
+
+
+def get_pool_status() -> dict:
+    """Current connection pool usage and checkout wait statistics"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool_class": type(pool).__name__}
+
+    return {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "timeout": DB_POOL_TIMEOUT,
+        "timeouts": pool_timeouts,
+        "wait_time_seconds": pool_wait_histogram.snapshot()
+    }
+
+
+def update_pool_metrics():
+    """Copy this worker's pool usage into the exported gauges"""
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        db_pool_size.set(pool.size())
+        db_pool_checked_out.set(pool.checkedout())
+        db_pool_overflow.set(max(pool.overflow(), 0))
+
 
+async def release_connection(session: AsyncSession):
+    """Return the session's connection to the pool before a long external call.
 
-def get_session():
-    """Get database session"""
-    with Session(engine) as session:
-        yield session 
\ No newline at end of file
+    Loaded objects keep their state (expire_on_commit is off) and the session
+    checks out a fresh connection the next time it is used.
+    """
+    await session.close()
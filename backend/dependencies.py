@@ -1,17 +1,78 @@
-from fastapi import Depends, HTTPException, status, Request
+import os
+from typing import Optional
+from fastapi import Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlmodel import Session, select
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from database import get_session
-from utils.security import verify_token
+from utils.cache import TTLCache, MISSING
+from utils.security import decode_access_token
 from utils.localization import get_localized_message
 
 security = HTTPBearer()
 
+# Set on responses when the token's membership claims are outdated
+TOKEN_REFRESH_HEADER = "X-Token-Refresh"
+
+# Authenticated principals keyed by token subject (email)
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+
+# Workspaces keyed by slug and roles keyed by (workspace_id, user_id); misses are cached as None
+WORKSPACE_CACHE_TTL = float(os.getenv("WORKSPACE_CACHE_TTL", "30"))
+WORKSPACE_CACHE_SIZE = int(os.getenv("WORKSPACE_CACHE_SIZE", "10000"))
+MEMBERSHIP_CACHE_SIZE = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "50000"))
+workspace_cache = TTLCache(maxsize=WORKSPACE_CACHE_SIZE, ttl=WORKSPACE_CACHE_TTL)
+membership_cache = TTLCache(maxsize=MEMBERSHIP_CACHE_SIZE, ttl=WORKSPACE_CACHE_TTL)
+
+# First page of each user's workspace list, keyed by (user_id, limit)
+workspace_list_cache = TTLCache(maxsize=WORKSPACE_CACHE_SIZE, ttl=WORKSPACE_CACHE_TTL)
+
+
+def invalidate_principal(email: str):
+    """Forget a cached principal after its user row changes"""
+    principal_cache.pop(email)
+
+
+def invalidate_workspace(slug: str, workspace_id: Optional[int] = None):
+    """Evict a workspace and, given its id, every cached role in it"""
+    workspace_cache.pop(slug)
+    if workspace_id is not None:
+        membership_cache.invalidate_where(lambda key: key[0] == workspace_id)
+
+
+def invalidate_membership(workspace_id: int, user_id: int):
+    """Evict one cached role after a membership change"""
+    membership_cache.pop((workspace_id, user_id))
+
+
+def invalidate_user_memberships(user_id: int):
+    """Evict every cached role of a user"""
+    membership_cache.invalidate_where(lambda key: key[1] == user_id)
+
+
+def invalidate_workspace_lists(user_ids):
+    """Evict cached workspace lists of users whose memberships or workspaces changed"""
+    user_ids = set(user_ids)
+    if user_ids:
+        workspace_list_cache.invalidate_where(lambda key: key[0] in user_ids)
+
+
+def _user_from_snapshot(snapshot: dict):
+    """Fresh detached User per request, so sessions never share an instance"""
+    from models.user import User
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    return user
+
 
 async def get_current_user(
     request: Request,
+    response: Response,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     from models.user import User
     """Get current user from JWT token"""
@@ -21,31 +82,141 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    email = verify_token(credentials.credentials)
-    if email is None:
+    claims = decode_access_token(credentials.credentials)
+    if claims is None:
         raise credentials_exception
+    email = claims["sub"]
     
-    # Get user from database
-    statement = select(User).where(User.email == email)
-    user = session.exec(statement).first()
-    
-    if user is None:
-        raise credentials_exception
+    snapshot = principal_cache.get(email)
+    if snapshot is not MISSING:
+        user = _user_from_snapshot(snapshot)
+    else:
+        # Get user from database
+        statement = select(User).where(User.email == email)
+        user = (await session.exec(statement)).first()
+        
+        if user is None:
+            raise credentials_exception
+        
+        principal_cache.set(email, user.model_dump())
     
+    _load_workspace_claims(request, response, claims, user)
     return user
 
 
+def _load_workspace_claims(request: Request, response: Response, claims: dict, user):
+    """Keep the token's workspace claims on request.state until a workspace check needs them.
+    
+    Their membership version is only compared with the database when
+    get_workspace_role reads them, so routes without a workspace stay query-free.
+    """
+    request.state.workspace_claims = None
+    request.state.pending_workspace_claims = None
+    if "mv" not in claims:
+        return
+    
+    if claims.get("uid") != user.id:
+        response.headers[TOKEN_REFRESH_HEADER] = "true"
+    elif claims.get("ws") is not None:
+        request.state.pending_workspace_claims = (claims["mv"], claims["ws"], response)
+
+
+async def _current_workspace_claims(session: AsyncSession, request: Request, user) -> Optional[dict]:
+    """Token workspace claims if their membership version is still current, else None.
+    
+    The version is read from the database, not the per-process principal
+    cache, so a membership change made on another worker revokes the claims
+    at once. The check runs at most once per request.
+    """
+    from models.user import User
+    
+    pending = getattr(request.state, "pending_workspace_claims", None)
+    if pending is None:
+        return getattr(request.state, "workspace_claims", None)
+    
+    request.state.pending_workspace_claims = None
+    claimed_version, workspace_claims, response = pending
+    statement = select(User.membership_version).where(User.id == user.id)
+    if (await session.exec(statement)).first() == claimed_version:
+        request.state.workspace_claims = workspace_claims
+    else:
+        response.headers[TOKEN_REFRESH_HEADER] = "true"
+    return request.state.workspace_claims
+
+
+def _workspace_from_snapshot(snapshot: dict):
+    from models.workspace import Workspace
+    workspace = Workspace(**snapshot)
+    make_transient_to_detached(workspace)
+    return workspace
+
+
+async def resolve_workspace(session: AsyncSession, slug: str):
+    """Workspace by slug through the workspace cache, or None"""
+    from models.workspace import Workspace
+    
+    snapshot = workspace_cache.get(slug)
+    if snapshot is not MISSING:
+        return _workspace_from_snapshot(snapshot) if snapshot is not None else None
+    
+    statement = select(Workspace).where(Workspace.slug == slug)
+    workspace = (await session.exec(statement)).first()
+    workspace_cache.set(slug, workspace.model_dump() if workspace else None)
+    return workspace
+
+
+async def get_workspace_role(session: AsyncSession, request: Request, workspace, user) -> Optional[str]:
+    """User's role in a workspace, or None when they have no access.
+    
+    Current token claims answer with a single version query; otherwise the
+    membership cache (per process, so a change made on another worker can
+    take up to WORKSPACE_CACHE_TTL to show) and then the membership table
+    are checked.
+    """
+    from models.workspace import WorkspaceMember
+    
+    if workspace.owner_id == user.id:
+        return "owner"
+    
+    workspace_claims = await _current_workspace_claims(session, request, user)
+    if workspace_claims is not None:
+        entry = workspace_claims.get(workspace.slug)
+        return entry[1] if entry and entry[0] == workspace.id else None
+    
+    key = (workspace.id, user.id)
+    role = membership_cache.get(key)
+    if role is not MISSING:
+        return role
+    
+    statement = select(WorkspaceMember.role).where(
+        WorkspaceMember.workspace_id == workspace.id,
+        WorkspaceMember.user_id == user.id
+    )
+    role = (await session.exec(statement)).first()
+    membership_cache.set(key, role)
+    return role
+
+
+async def require_workspace_member(session: AsyncSession, request: Request, workspace, user) -> str:
+    """Role of a workspace member; 403 for everyone else"""
+    role = await get_workspace_role(session, request, workspace, user)
+    if role is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=get_localized_message("WORKSPACE_ACCESS_DENIED", request)
+        )
+    return role
+
+
 async def get_current_workspace(
     workspace_slug: str,
     request: Request,
     current_user = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    from models.workspace import Workspace, WorkspaceMember
     """Get current workspace and verify user access"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -53,25 +224,7 @@ async def get_current_workspace(
             detail=get_localized_message("WORKSPACE_NOT_FOUND", request)
         )
     
-    # Check if user is owner or member of this workspace
-    if workspace.owner_id == current_user.id:
-        # User is the owner, allow access
-        pass
-    else:
-        # Check if user is a member of this workspace
-        statement = select(WorkspaceMember).where(
-            WorkspaceMember.workspace_id == workspace.id,
-            WorkspaceMember.user_id == current_user.id
-        )
-        membership = session.exec(statement).first()
-        
-        if not membership:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=get_localized_message("WORKSPACE_ACCESS_DENIED", request)
-            )
+    # Owner, member by current token claims, or member in the database
+    await require_workspace_member(session, request, workspace, current_user)
     
     return workspace
-
-
- 
\ No newline at end of file
@@ -1,19 +1,28 @@
 # backend/main.py
 
 import os
+import time
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from database import init_db
+from database import init_db, update_pool_metrics
 from routers.auth import router as auth_router
 from routers.workspaces import router as workspaces_router
+from routers.exports import router as exports_router
+from routers.monitoring import router as monitoring_router, metrics_router
 from tools.trend_agent.router import router as trend_agent_router
 from tools.seo_strategist.router import router as seo_strategist_router
 from tools.adcreative.router import router as adcreative_router
-from utils.logging_config import setup_logging, get_logger
+from utils.logging_config import setup_logging, stop_logging, get_logger
 from utils.rate_limiting import setup_rate_limiting
 from utils.exception_handlers import setup_exception_handlers
+from utils.query_stats import start_query_tracking
+from utils.request_context import start_request
+from utils.tracing import start_trace, span, finish_trace, server_timing, shutdown_tracing
+from utils.access_log import log_access, route_template
+from utils.metrics import http_requests_in_flight, observe_request, mark_worker_exit
+from utils.security import shutdown_password_hashing
 load_dotenv()
 
 # Setup logging
@@ -43,14 +52,20 @@ async def lifespan(app: FastAPI):
             logger.warning("GOOGLE_DRIVE_CREDENTIALS_URL not found")
             
     except Exception as e:
-        logger.warning(f"Google credentials setup failed: {e}")
+        logger.warning("Google credentials setup failed: %s", e)
     
     # Initialize database
-    init_db()
+    await init_db()
     logger.info("Database initialized successfully")
     yield
     # Shutdown
     logger.info("Shutting down Gipoly Backend API...")
+    shutdown_password_hashing()
+    mark_worker_exit()
+    shutdown_tracing()
+    
+    # Flush queued log records last
+    stop_logging()
 
 
 app = FastAPI(
@@ -67,6 +82,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Token-Refresh", "Retry-After", "X-Request-ID"],
 )
 
 # Setup rate limiting (only in production)
@@ -85,6 +101,9 @@ app.include_router(workspaces_router)
 app.include_router(trend_agent_router)
 app.include_router(seo_strategist_router)
 app.include_router(adcreative_router)
+app.include_router(exports_router)
+app.include_router(monitoring_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
@@ -100,18 +119,35 @@ def read_root():
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Log all requests."""
-    import time
-    start_time = time.time()
+    """Log all requests as sampled JSON access records, record their metrics and trace them."""
+    start_time = time.perf_counter()
+    context = start_request(request.headers.get("X-Request-ID"))
+    query_stats = start_query_tracking(f"{request.method} {request.url.path}")
+    trace = start_trace(context.request_id)
+    http_requests_in_flight.inc()
     
-    response = await call_next(request)
+    try:
+        with span("request", method=request.method, path=request.url.path) as root:
+            try:
+                response = await call_next(request)
+                status_code = response.status_code
+            except Exception:
+                status_code = 500
+                raise
+            finally:
+                duration = time.perf_counter() - start_time
+                http_requests_in_flight.dec()
+                # Unmatched paths share one label so scanners can't grow the series count
+                route = route_template(request) if request.scope.get("route") else "<unmatched>"
+                root.attributes.update(route=route, status=status_code, request_id=context.request_id)
+                observe_request(request.method, route, status_code, duration)
+                update_pool_metrics()
+                log_access(request, status_code, duration, query_stats, context)
+    finally:
+        finish_trace(trace, root)
     
-    process_time = time.time() - start_time
-    logger.info(
-        f"{request.method} {request.url.path} - "
-        f"Status: {response.status_code} - "
-        f"Time: {process_time:.3f}s"
-    )
+    response.headers["X-Request-ID"] = context.request_id
+    response.headers["Server-Timing"] = server_timing(trace, duration, root)
     
     return response
 
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """
-Database migration script for adding TrendSuggestion table.
+Database migration script: creates missing tables and upgrades existing columns.
 """
 
 import os
 import sys
 from sqlmodel import SQLModel, create_engine
+from sqlalchemy import inspect, text
 from dotenv import load_dotenv
 
 # Add the backend directory to the Python path
@@ -22,17 +23,103 @@ if not DATABASE_URL:
     sys.exit(1)
 
 # Create engine
-engine = create_engine(DATABASE_URL, echo=True)
+engine = create_engine(DATABASE_URL, echo=os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes"))
+
+
+# Tool payload columns that were stored as Text before JSONB support
+JSONB_COLUMNS = {
+    "trend_suggestions": ["request_data", "response_data"],
+    "seo_analyses": ["request_data", "response_data"],
+    "adcreative_analyses": ["request_data", "response_data"],
+}
+
+
+def convert_payload_columns_to_jsonb():
+    """Convert legacy Text payload columns to JSONB (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    with engine.begin() as conn:
+        for table, columns in JSONB_COLUMNS.items():
+            for column in columns:
+                data_type = conn.execute(
+                    text(
+                        "SELECT data_type FROM information_schema.columns "
+                        "WHERE table_name = :table AND column_name = :column"
+                    ),
+                    {"table": table, "column": column}
+                ).scalar()
+                
+                if data_type in ("text", "character varying"):
+                    print(f"Converting {table}.{column} to JSONB...")
+                    conn.execute(text(
+                        f"ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb"
+                    ))
+
+
+# Payload columns that became nullable when archiving was introduced
+NULLABLE_PAYLOAD_COLUMNS = {
+    "seo_analyses": ["response_data"],
+    "adcreative_analyses": ["response_data"],
+}
+
+
+def add_missing_columns():
+    """Add columns declared on models that existing tables are missing.
+    
+    New columns must be nullable or carry a server default.
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                
+                ddl = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                
+                print(f"Adding {table.name}.{column.name}...")
+                conn.execute(text(ddl))
+
+
+def relax_payload_columns():
+    """Drop NOT NULL from payload columns that archived rows clear (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    
+    with engine.begin() as conn:
+        for table, columns in NULLABLE_PAYLOAD_COLUMNS.items():
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP NOT NULL"))
+
+
+def create_missing_indexes():
+    """Create indexes declared on models that existing tables are missing."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 def migrate_database():
-    """Add TrendSuggestion table to the database."""
+    """Create missing tables and upgrade existing columns."""
     try:
         print("Starting database migration...")
         
         # Import all models to register them
         from models.user import User
         from models.workspace import Workspace, WorkspaceMember
+        from models.usage import UsageCounter
+        from models.archive import ArchivedPayload
         from tools.trend_agent.models import TrendSuggestion, TrendCategory
         from tools.seo_strategist.models import SEOAnalysis
         from tools.adcreative.models import AdCreativeAnalysis
@@ -42,6 +129,12 @@ def migrate_database():
         # Create all tables
         SQLModel.metadata.create_all(engine)
         
+        # Upgrade existing columns
+        add_missing_columns()
+        convert_payload_columns_to_jsonb()
+        relax_payload_columns()
+        create_missing_indexes()
+        
         print("✅ Database migration completed successfully!")
 
     except Exception as e:
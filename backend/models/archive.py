@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field, Column, LargeBinary
+
+
+class ArchivedPayload(SQLModel, table=True):
+    """Compressed tool payload moved out of a hot table, stored once per content hash"""
+    __tablename__ = "archived_payloads"
+    content_hash: str = Field(primary_key=True, max_length=64)
+    codec: str = Field(description="Compression codec: 'zstd' or 'gzip'")
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    original_size: int = Field(description="Size of the uncompressed JSON in bytes")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,6 @@
+from sqlalchemy import JSON
+from sqlalchemy.dialects.postgresql import JSONB
+
+# Tool request/response payloads: native JSONB on PostgreSQL, JSON text elsewhere.
+# Python None is stored as SQL NULL so archived rows can drop their payload.
+JSONPayload = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
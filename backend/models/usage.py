@@ -0,0 +1,12 @@
+from datetime import datetime
+from sqlmodel import SQLModel, Field
+
+
+class UsageCounter(SQLModel, table=True):
+    """Quota usage of one resource by one subject (a workspace's tool runs, a user's workspaces)"""
+    __tablename__ = "usage_counters"
+    scope: str = Field(primary_key=True)
+    scope_id: int = Field(primary_key=True)
+    resource: str = Field(primary_key=True)
+    used: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
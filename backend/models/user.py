@@ -15,6 +15,8 @@ class User(SQLModel, table=True, extend_existing=True):
     website_url: Optional[str] = None
     store_platform: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Bumped on membership changes; tokens carrying an older stamp lose their workspace claims
+    membership_version: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     
     # Relationships
     owned_workspaces: List["Workspace"] = Relationship(back_populates="owner")
@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 import shortuuid
 
 if TYPE_CHECKING:
@@ -37,6 +38,11 @@ class Workspace(SQLModel, table=True, extend_existing=True):
 
 class WorkspaceMember(SQLModel, table=True, extend_existing=True):
     __tablename__ = "workspace_member"
+    __table_args__ = (
+        # Member listing per workspace and workspace listing per user
+        Index("ix_workspace_member_workspace_created", "workspace_id", "created_at", "id"),
+        Index("ix_workspace_member_user_workspace", "user_id", "workspace_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     workspace_id: int = Field(foreign_key="workspace.id")
     user_id: int = Field(foreign_key="user.id")
@@ -1,47 +1,73 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from database import get_session
 from models.user import User
+from models.workspace import Workspace, WorkspaceMember
 from schemas.user import UserCreate, UserLogin, UserRead, UserUpdate, PasswordChange, Token
-from utils.security import get_password_hash, verify_password, create_access_token
+from utils.security import (
+    get_password_hash_async, verify_password_async, create_access_token,
+    membership_claims, JWT_MEMBERSHIP_CLAIMS, ACCESS_TOKEN_EXPIRE_MINUTES
+)
 from utils.localization import get_localized_message
-from utils.rate_limiting import check_login_attempts, record_failed_login, record_successful_login
+from utils.rate_limiting import (
+    limiter, AUTH_RATE_LIMIT, check_login_attempts, record_failed_login, record_successful_login
+)
 from utils.logging_config import get_logger
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from dependencies import get_current_user
+from utils.quotas import USER_SCOPE, clear_quotas
+from dependencies import (
+    get_current_user, invalidate_principal, invalidate_user_memberships, invalidate_workspace_lists
+)
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 logger = get_logger(__name__)
 
-# Rate limiter instance
-limiter = Limiter(key_func=get_remote_address)
+
+
+async def _issue_access_token(session: AsyncSession, user: User) -> str:
+    """Sign an access token, with membership claims when enabled"""
+    data = {"sub": user.email}
+    if JWT_MEMBERSHIP_CLAIMS:
+        # The version comes from the same query as the memberships, never from
+        # the cached principal, so a refreshed token is current on every worker
+        rows = (await session.exec(
+            select(User.membership_version, Workspace.slug, Workspace.id, WorkspaceMember.role)
+            .select_from(User)
+            .outerjoin(WorkspaceMember, WorkspaceMember.user_id == User.id)
+            .outerjoin(Workspace, Workspace.id == WorkspaceMember.workspace_id)
+            .where(User.id == user.id)
+        )).all()
+        membership_version = rows[0].membership_version if rows else user.membership_version
+        memberships = [(row.slug, row.id, row.role) for row in rows if row.slug is not None]
+        data.update(membership_claims(user.id, membership_version, memberships))
+    
+    return create_access_token(data=data, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
 
 
 @router.post("/register", response_model=UserRead)
-@limiter.limit("5/minute")
-def register(
+@limiter.limit(AUTH_RATE_LIMIT)
+async def register(
     request: Request,
     user_data: UserCreate, 
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Register a new user."""
-    logger.info(f"Registration attempt for email: {user_data.email}")
+    logger.info("Registration attempt for email: %s", user_data.email)
     
     # Check if user already exists
     statement = select(User).where(User.email == user_data.email)
-    existing_user = session.exec(statement).first()
+    existing_user = (await session.exec(statement)).first()
     
     if existing_user:
-        logger.warning(f"Registration failed - email already exists: {user_data.email}")
+        logger.warning("Registration failed - email already exists: %s", user_data.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=get_localized_message("EMAIL_ALREADY_REGISTERED", request)
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password, request)
     user = User(
         email=user_data.email,
         password=hashed_password,
@@ -51,33 +77,33 @@ def register(
     )
     
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     
-    logger.info(f"User registered successfully: {user.email}")
+    logger.info("User registered successfully: %s", user.email)
     return user
 
 
 @router.post("/login", response_model=Token)
-@limiter.limit("5/minute")
-def login(
+@limiter.limit(AUTH_RATE_LIMIT)
+async def login(
     request: Request,
     user_credentials: UserLogin, 
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Login user and return JWT token."""
-    logger.info(f"Login attempt for email: {user_credentials.email}")
+    logger.info("Login attempt for email: %s", user_credentials.email)
     
     # Check for brute force attempts
-    check_login_attempts(user_credentials.email)
+    await check_login_attempts(user_credentials.email)
     
     # Find user by email
     statement = select(User).where(User.email == user_credentials.email)
-    user = session.exec(statement).first()
+    user = (await session.exec(statement)).first()
     
     if not user:
-        record_failed_login(user_credentials.email)
-        logger.warning(f"Login failed - user not found: {user_credentials.email}")
+        await record_failed_login(user_credentials.email)
+        logger.warning("Login failed - user not found: %s", user_credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=get_localized_message("INVALID_CREDENTIALS", request),
@@ -85,9 +111,9 @@ def login(
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user.password):
-        record_failed_login(user_credentials.email)
-        logger.warning(f"Login failed - invalid password for: {user_credentials.email}")
+    if not await verify_password_async(user_credentials.password, user.password, request):
+        await record_failed_login(user_credentials.email)
+        logger.warning("Login failed - invalid password for: %s", user_credentials.email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=get_localized_message("INVALID_CREDENTIALS", request),
@@ -95,37 +121,45 @@ def login(
         )
     
     # Create access token
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = await _issue_access_token(session, user)
     
     # Record successful login
-    record_successful_login(user_credentials.email)
-    logger.info(f"User logged in successfully: {user.email}")
+    await record_successful_login(user_credentials.email)
+    logger.info("User logged in successfully: %s", user.email)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 
+@router.post("/token/refresh", response_model=Token)
+async def refresh_token(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session)
+):
+    """Issue a fresh access token with current membership claims."""
+    access_token = await _issue_access_token(session, current_user)
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
 @router.get("/me", response_model=UserRead)
-def get_current_user_info(
+async def get_current_user_info(
     request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Get current user information."""
-    logger.info(f"User info requested for: {current_user.email}")
+    logger.info("User info requested for: %s", current_user.email)
     return current_user
 
 
 @router.put("/profile", response_model=UserRead)
-def update_profile(
+async def update_profile(
     request: Request,
     user_data: UserUpdate,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Update user profile."""
-    logger.info(f"Profile update requested for: {current_user.email}")
+    logger.info("Profile update requested for: %s", current_user.email)
     
     # Update user fields
     if user_data.full_name is not None:
@@ -136,52 +170,58 @@ def update_profile(
         current_user.store_platform = user_data.store_platform
     
     session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
+    await session.commit()
+    await session.refresh(current_user)
+    invalidate_principal(current_user.email)
     
-    logger.info(f"Profile updated successfully for: {current_user.email}")
+    logger.info("Profile updated successfully for: %s", current_user.email)
     return current_user
 
 
 @router.put("/change-password")
-def change_password(
+async def change_password(
     request: Request,
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Change user password."""
-    logger.info(f"Password change requested for: {current_user.email}")
+    logger.info("Password change requested for: %s", current_user.email)
     
     # Verify current password
-    if not verify_password(password_data.current_password, current_user.password):
-        logger.warning(f"Password change failed - incorrect current password for: {current_user.email}")
+    if not await verify_password_async(password_data.current_password, current_user.password, request):
+        logger.warning("Password change failed - incorrect current password for: %s", current_user.email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=get_localized_message("CURRENT_PASSWORD_INCORRECT", request)
         )
     
     # Update password
-    current_user.password = get_password_hash(password_data.new_password)
+    current_user.password = await get_password_hash_async(password_data.new_password, request)
     session.add(current_user)
-    session.commit()
+    await session.commit()
+    invalidate_principal(current_user.email)
     
-    logger.info(f"Password changed successfully for: {current_user.email}")
+    logger.info("Password changed successfully for: %s", current_user.email)
     return {"message": get_localized_message("PASSWORD_CHANGED", request)}
 
 
 @router.delete("/profile")
-def delete_account(
+async def delete_account(
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Delete user account."""
-    logger.info(f"Account deletion requested for: {current_user.email}")
+    logger.info("Account deletion requested for: %s", current_user.email)
     
-    # Delete user
-    session.delete(current_user)
-    session.commit()
+    # Delete user and their usage counters
+    await session.delete(current_user)
+    await clear_quotas(session, USER_SCOPE, current_user.id)
+    await session.commit()
+    invalidate_principal(current_user.email)
+    invalidate_user_memberships(current_user.id)
+    invalidate_workspace_lists([current_user.id])
     
-    logger.info(f"Account deleted successfully for: {current_user.email}")
+    logger.info("Account deleted successfully for: %s", current_user.email)
     return {"message": get_localized_message("ACCOUNT_DELETED", request)} 
\ No newline at end of file
@@ -0,0 +1,180 @@
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_session, release_connection, async_session
+from dependencies import get_current_workspace
+from models.workspace import Workspace
+from tools.trend_agent.models import TrendSuggestion
+from tools.seo_strategist.models import SEOAnalysis
+from tools.adcreative.models import AdCreativeAnalysis
+from utils.archive import load_archived_payloads
+from utils.localization import get_localized_message
+from utils.logging_config import get_logger
+
+router = APIRouter(prefix="/api/workspaces", tags=["exports"])
+logger = get_logger(__name__)
+
+# Exportable tool histories, keyed by the tool's URL name
+EXPORT_SOURCES = {
+    "trend-agent": TrendSuggestion,
+    "seo-strategist": SEOAnalysis,
+    "adcreative": AdCreativeAnalysis,
+}
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 500
+
+# Bytes buffered before a chunk is sent to the client
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def _parse_tools(tools: Optional[str], request: Request) -> List[str]:
+    if not tools:
+        return list(EXPORT_SOURCES)
+
+    selected = list(dict.fromkeys(t.strip() for t in tools.split(",") if t.strip()))
+    if not selected or any(t not in EXPORT_SOURCES for t in selected):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=get_localized_message("INVALID_EXPORT_TOOLS", request)
+        )
+    return selected
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """created_at is stored as naive UTC; convert aware query values to match"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _export_statement(model, workspace_id: int, since: Optional[datetime], until: Optional[datetime]):
+    columns = [
+        model.id, model.user_id, model.created_at,
+        model.request_data, model.response_data, model.response_archive_hash
+    ]
+    if model is SEOAnalysis:
+        columns.append(SEOAnalysis.analysis_type)
+
+    statement = select(*columns).where(model.workspace_id == workspace_id)
+    if since:
+        statement = statement.where(model.created_at >= since)
+    if until:
+        statement = statement.where(model.created_at < until)
+
+    return (
+        statement
+        .order_by(model.created_at, model.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+async def _export_lines(
+    workspace_id: int,
+    tools: List[str],
+    since: Optional[datetime],
+    until: Optional[datetime]
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON-encoded chunks straight from a server-side cursor"""
+    buffer = []
+    buffered = 0
+    exported = 0
+
+    # The request session is closed by now; the export owns its connections.
+    # Archived payloads are read on a second session while the cursor is open.
+    async with async_session() as session, async_session() as archive_session:
+        for tool in tools:
+            model = EXPORT_SOURCES[tool]
+            result = await session.stream(_export_statement(model, workspace_id, since, until))
+
+            async for rows in result.partitions(EXPORT_BATCH_SIZE):
+                # One lookup per fetched batch for the rows whose payload is archived
+                archived = await load_archived_payloads(
+                    archive_session, (row.response_archive_hash for row in rows)
+                )
+
+                for row in rows:
+                    response_data = row.response_data
+                    if row.response_archive_hash:
+                        response_data = archived.get(row.response_archive_hash, {})
+
+                    record = {
+                        "tool": tool,
+                        "id": row.id,
+                        "workspace_id": workspace_id,
+                        "user_id": row.user_id,
+                        "created_at": row.created_at.isoformat(),
+                        "request_data": row.request_data,
+                        "response_data": response_data,
+                    }
+                    if model is SEOAnalysis:
+                        record["analysis_type"] = row.analysis_type
+
+                    line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode()
+                    buffer.append(line)
+                    buffered += len(line)
+                    exported += 1
+
+                    if buffered >= EXPORT_CHUNK_SIZE:
+                        yield b"".join(buffer)
+                        buffer = []
+                        buffered = 0
+
+    if buffer:
+        yield b"".join(buffer)
+
+    logger.info("Exported %s rows for workspace_id: %s", exported, workspace_id)
+
+
+async def _gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a chunk stream incrementally into a single gzip member"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+@router.get("/{workspace_slug}/export")
+async def export_workspace_history(
+    workspace_slug: str,
+    request: Request,
+    tools: Optional[str] = Query(None, description="Comma separated tools: trend-agent, seo-strategist, adcreative"),
+    since: Optional[datetime] = Query(None, description="Only rows created at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only rows created before this time (UTC)"),
+    gzip: bool = Query(False, description="Gzip-compress the stream"),
+    current_workspace: Workspace = Depends(get_current_workspace),
+    session: AsyncSession = Depends(get_session)
+):
+    """
+    Stream a workspace's tool history as newline-delimited JSON.
+
+    Rows are read through a server-side cursor and written as they arrive,
+    so memory use stays flat regardless of history size.
+    """
+    selected_tools = _parse_tools(tools, request)
+    workspace_id = current_workspace.id
+
+    # Access is checked; free the request's connection before streaming
+    await release_connection(session)
+
+    body = _export_lines(workspace_id, selected_tools, _naive_utc(since), _naive_utc(until))
+    filename = f"{workspace_slug}-export.ndjson"
+    media_type = "application/x-ndjson"
+
+    if gzip:
+        body = _gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,137 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Request, Response, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_pool_status, get_session
+from dependencies import principal_cache, workspace_cache, membership_cache, workspace_list_cache
+from utils.security import get_password_hashing_status
+from utils.admission import trend_admission, seo_admission, adcreative_admission
+from utils.llm_budget import gemini_budget
+from utils.llm import gemini_limiter, imagen_limiter
+from utils.logging_config import get_logging_status
+from utils.metrics import render_metrics
+from prometheus_client import CONTENT_TYPE_LATEST
+from utils.localization import get_localized_message
+from utils.tool_runs import stage_timing_aggregates
+from tools.trend_agent.models import TrendSuggestion
+from tools.seo_strategist.models import SEOAnalysis
+from tools.adcreative.models import AdCreativeAnalysis
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+# Prometheus scrapes /metrics at the root, outside the /monitoring prefix
+metrics_router = APIRouter(tags=["monitoring"])
+
+# Shared secret for operational endpoints; without one they are disabled
+MONITORING_TOKEN = os.getenv("MONITORING_TOKEN")
+
+# Tool tables with recorded run timings, keyed by the tool's URL name
+TOOL_RUN_SOURCES = {
+    "trend-agent": TrendSuggestion,
+    "seo-strategist": SEOAnalysis,
+    "adcreative": AdCreativeAnalysis,
+}
+
+
+def _bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Credentials of an "Authorization: Bearer <token>" header"""
+    scheme, _, credentials = (authorization or "").partition(" ")
+    return credentials.strip() if scheme.lower() == "bearer" else None
+
+
+def verify_monitoring_access(
+    request: Request,
+    x_monitoring_token: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None)
+):
+    """Require the monitoring token; deny everyone when none is configured.
+    
+    The token is read from X-Monitoring-Token or, for Prometheus scrape
+    configs (bearer_token / authorization), from a bearer Authorization header.
+    """
+    token = x_monitoring_token or _bearer_token(authorization) or ""
+    if not MONITORING_TOKEN or not secrets.compare_digest(token.encode(), MONITORING_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=get_localized_message("ACCESS_DENIED", request)
+        )
+
+
+@router.get("/db-pool", dependencies=[Depends(verify_monitoring_access)])
+async def db_pool_status():
+    """Database connection pool usage and checkout wait times."""
+    return get_pool_status()
+
+
+@router.get("/password-hashing", dependencies=[Depends(verify_monitoring_access)])
+async def password_hashing_status():
+    """Password hashing executor queue depth, rejections and hash times."""
+    return get_password_hashing_status()
+
+
+@router.get("/caches", dependencies=[Depends(verify_monitoring_access)])
+async def cache_status():
+    """Size and hit rates of in-process caches."""
+    return {
+        "principals": principal_cache.snapshot(),
+        "workspaces": workspace_cache.snapshot(),
+        "memberships": membership_cache.snapshot(),
+        "workspace_lists": workspace_list_cache.snapshot()
+    }
+
+
+@router.get("/admission", dependencies=[Depends(verify_monitoring_access)])
+async def admission_status():
+    """Per-workspace LLM slots in use, queued requests and rejections."""
+    return {
+        controller.name: controller.snapshot()
+        for controller in (trend_admission, seo_admission, adcreative_admission)
+    }
+
+
+@router.get("/llm-budget", dependencies=[Depends(verify_monitoring_access)])
+async def llm_budget_status():
+    """Remaining Gemini token and request budget."""
+    return gemini_budget.snapshot()
+
+
+@router.get("/llm-concurrency", dependencies=[Depends(verify_monitoring_access)])
+async def llm_concurrency_status():
+    """Adaptive concurrency limits and latency of outbound model calls."""
+    return {
+        limiter.name: limiter.snapshot()
+        for limiter in (gemini_limiter, imagen_limiter)
+    }
+
+
+@router.get("/logging", dependencies=[Depends(verify_monitoring_access)])
+async def logging_status():
+    """Log queue depth and records dropped under back-pressure."""
+    return get_logging_status()
+
+
+@router.get("/tool-timings", dependencies=[Depends(verify_monitoring_access)])
+async def tool_timings(
+    request: Request,
+    tool: Optional[str] = Query(None, description="Tool URL name, e.g. 'adcreative'; all tools when omitted"),
+    days: int = Query(7, ge=1, le=90),
+    db: AsyncSession = Depends(get_session)
+):
+    """Daily p50/p95 per pipeline stage, retries and token usage of tool runs."""
+    if tool is not None and tool not in TOOL_RUN_SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=get_localized_message("INVALID_TOOL", request)
+        )
+
+    since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days - 1)
+    tools = [tool] if tool else list(TOOL_RUN_SOURCES)
+    return {name: await stage_timing_aggregates(db, TOOL_RUN_SOURCES[name], since) for name in tools}
+
+
+@metrics_router.get("/metrics", dependencies=[Depends(verify_monitoring_access)], include_in_schema=False)
+async def metrics():
+    """Request, upstream and DB pool metrics in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
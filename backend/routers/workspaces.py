@@ -1,6 +1,8 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlalchemy import update
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from database import get_session
 from models.user import User
 from models.workspace import Workspace, WorkspaceMember
@@ -8,27 +10,60 @@ from schemas.workspace import (
     WorkspaceCreate, WorkspaceRead, WorkspaceWithMembers, 
     WorkspaceUpdate, WorkspaceMemberCreate, WorkspaceMemberRead
 )
-from dependencies import get_current_user
+from dependencies import (
+    get_current_user, require_workspace_member, resolve_workspace, workspace_list_cache,
+    invalidate_principal, invalidate_workspace, invalidate_membership, invalidate_workspace_lists
+)
+from utils.cache import MISSING
 from utils.localization import get_localized_message
 from utils.logging_config import get_logger
+from utils.quotas import (
+    USER_SCOPE, WORKSPACE_SCOPE, OWNED_WORKSPACES, WORKSPACE_LIMIT,
+    reserve_quota, release_quota, clear_quotas
+)
+from utils.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, apply_keyset_pagination, finalize_page
+)
 
 router = APIRouter(prefix="/api/workspaces", tags=["workspaces"])
 logger = get_logger(__name__)
 
 
+async def _bump_membership_version(session: AsyncSession, user_id: int) -> Optional[str]:
+    """Invalidate membership claims in the user's tokens; returns their email"""
+    result = await session.exec(
+        update(User)
+        .where(User.id == user_id)
+        .values(membership_version=User.membership_version + 1)
+        .returning(User.email)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _member_ids(session: AsyncSession, workspace_id: int) -> List[int]:
+    """Users who see this workspace in their workspace list"""
+    return list((await session.exec(
+        select(WorkspaceMember.user_id).where(WorkspaceMember.workspace_id == workspace_id)
+    )).all())
+
+
 @router.post("/", response_model=WorkspaceRead)
-def create_workspace(
+async def create_workspace(
     workspace_data: WorkspaceCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Create a new workspace (max 3 per user)"""
-    # Check if user already has 3 workspaces
-    statement = select(Workspace).where(Workspace.owner_id == current_user.id)
-    existing_workspaces = session.exec(statement).all()
+    # Reserve one of the user's 3 workspaces; committed together with the workspace
+    reserved = await reserve_quota(
+        session, USER_SCOPE, current_user.id, OWNED_WORKSPACES, WORKSPACE_LIMIT,
+        count_existing=select(func.count()).select_from(Workspace).where(
+            Workspace.owner_id == current_user.id
+        )
+    )
     
-    if len(existing_workspaces) >= 3:
+    if not reserved:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=get_localized_message("MAX_WORKSPACES", request)
@@ -42,12 +77,12 @@ def create_workspace(
         )
     
     # Check if workspace name already exists for this user
-    existing_workspace = session.exec(
+    existing_workspace = (await session.exec(
         select(Workspace).where(
             Workspace.owner_id == current_user.id,
             Workspace.name == workspace_data.name.strip()
         )
-    ).first()
+    )).first()
     
     if existing_workspace:
         raise HTTPException(
@@ -64,8 +99,8 @@ def create_workspace(
     )
     
     session.add(workspace)
-    session.commit()
-    session.refresh(workspace)
+    await session.commit()
+    await session.refresh(workspace)
     
     # Create owner membership
     owner_membership = WorkspaceMember(
@@ -75,58 +110,79 @@ def create_workspace(
     )
     
     session.add(owner_membership)
-    session.commit()
+    await session.commit()
+    invalidate_workspace(workspace.slug, workspace.id)
+    invalidate_workspace_lists([current_user.id])
     
     return workspace
 
 
 @router.get("/", response_model=List[WorkspaceWithMembers])
-def list_user_workspaces(
+async def list_user_workspaces(
     request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    """Get all workspaces where user is a member"""
-    # Get all workspaces where user is a member
-    statement = select(Workspace).join(WorkspaceMember).where(
+    """Get workspaces where user is a member, oldest first (paginated)"""
+    # The first page is served from a per-user cache
+    cache_key = (current_user.id, limit)
+    if cursor is None:
+        cached = workspace_list_cache.get(cache_key)
+        if cached is not MISSING:
+            result, next_cursor = cached
+            if next_cursor:
+                response.headers[NEXT_CURSOR_HEADER] = next_cursor
+            return result
+    
+    # Workspaces and the user's role in each, in one query
+    statement = select(
+        Workspace.id,
+        Workspace.name,
+        Workspace.slug,
+        Workspace.store_url,
+        Workspace.store_platform,
+        Workspace.created_at,
+        Workspace.owner_id,
+        WorkspaceMember.role
+    ).join(WorkspaceMember, WorkspaceMember.workspace_id == Workspace.id).where(
         WorkspaceMember.user_id == current_user.id
     )
-    workspaces = session.exec(statement).all()
-    
-    # Get user's role in each workspace
-    result = []
-    for workspace in workspaces:
-        membership_statement = select(WorkspaceMember).where(
-            WorkspaceMember.workspace_id == workspace.id,
-            WorkspaceMember.user_id == current_user.id
+    statement = apply_keyset_pagination(statement, Workspace, cursor, limit, descending=False, request=request)
+    rows = finalize_page((await session.exec(statement)).all(), limit, response)
+    
+    result = [
+        WorkspaceWithMembers(
+            id=row.id,
+            name=row.name,
+            slug=row.slug,
+            store_url=row.store_url,
+            store_platform=row.store_platform,
+            created_at=row.created_at,
+            owner_id=row.owner_id,
+            user_role=row.role
         )
-        membership = session.exec(membership_statement).first()
-        
-        result.append(WorkspaceWithMembers(
-            id=workspace.id,
-            name=workspace.name,
-            slug=workspace.slug,
-            store_url=workspace.store_url,
-            store_platform=workspace.store_platform,
-            created_at=workspace.created_at,
-            owner_id=workspace.owner_id,
-            user_role=membership.role if membership else "member"
-        ))
+        for row in rows
+    ]
+    
+    if cursor is None:
+        workspace_list_cache.set(cache_key, (result, response.headers.get(NEXT_CURSOR_HEADER)))
     
     return result
 
 
 @router.get("/{workspace_slug}", response_model=WorkspaceRead)
-def get_workspace(
+async def get_workspace(
     workspace_slug: str,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get specific workspace details (user must be a member)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -135,33 +191,22 @@ def get_workspace(
         )
     
     # Check if user is a member
-    membership_statement = select(WorkspaceMember).where(
-        WorkspaceMember.workspace_id == workspace.id,
-        WorkspaceMember.user_id == current_user.id
-    )
-    membership = session.exec(membership_statement).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=get_localized_message("WORKSPACE_ACCESS_DENIED", request)
-        )
+    await require_workspace_member(session, request, workspace, current_user)
     
     return workspace
 
 
 @router.put("/{workspace_slug}", response_model=WorkspaceRead)
-def update_workspace(
+async def update_workspace(
     workspace_slug: str,
     workspace_data: WorkspaceUpdate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Update workspace (only owner can update)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -185,24 +230,25 @@ def update_workspace(
         workspace.store_platform = workspace_data.store_platform
     
     session.add(workspace)
-    session.commit()
-    session.refresh(workspace)
+    await session.commit()
+    await session.refresh(workspace)
+    invalidate_workspace(workspace_slug, workspace.id)
+    invalidate_workspace_lists(await _member_ids(session, workspace.id))
     
-    logger.info(f"Workspace updated: {workspace.slug} by user: {current_user.email}")
+    logger.info("Workspace updated: %s by user: %s", workspace.slug, current_user.email)
     return workspace
 
 
 @router.delete("/{workspace_slug}")
-def delete_workspace(
+async def delete_workspace(
     workspace_slug: str,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Delete workspace (only owner can delete)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -217,26 +263,32 @@ def delete_workspace(
             detail=get_localized_message("WORKSPACE_OWNER_ONLY", request)
         )
     
-    # Delete workspace (cascade will handle members)
-    session.delete(workspace)
-    session.commit()
+    # Members whose workspace lists change
+    member_ids = await _member_ids(session, workspace.id)
+    
+    # Delete workspace (cascade will handle members) and its usage counters
+    await session.delete(workspace)
+    await clear_quotas(session, WORKSPACE_SCOPE, workspace.id)
+    await release_quota(session, USER_SCOPE, current_user.id, OWNED_WORKSPACES)
+    await session.commit()
+    invalidate_workspace(workspace_slug, workspace.id)
+    invalidate_workspace_lists(member_ids)
     
-    logger.info(f"Workspace deleted: {workspace_slug} by user: {current_user.email}")
+    logger.info("Workspace deleted: %s by user: %s", workspace_slug, current_user.email)
     return {"message": get_localized_message("WORKSPACE_DELETED", request)}
 
 
 @router.post("/{workspace_slug}/members", response_model=WorkspaceMemberRead)
-def add_member(
+async def add_member(
     workspace_slug: str,
     member_data: WorkspaceMemberCreate,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Add member to workspace (only owner can add members)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -253,7 +305,7 @@ def add_member(
     
     # Find user to add
     user_statement = select(User).where(User.email == member_data.email)
-    user_to_add = session.exec(user_statement).first()
+    user_to_add = (await session.exec(user_statement)).first()
     
     if not user_to_add:
         raise HTTPException(
@@ -262,12 +314,12 @@ def add_member(
         )
     
     # Check if user is already a member
-    existing_membership = session.exec(
+    existing_membership = (await session.exec(
         select(WorkspaceMember).where(
             WorkspaceMember.workspace_id == workspace.id,
             WorkspaceMember.user_id == user_to_add.id
         )
-    ).first()
+    )).first()
     
     if existing_membership:
         raise HTTPException(
@@ -283,24 +335,30 @@ def add_member(
     )
     
     session.add(membership)
-    session.commit()
-    session.refresh(membership)
-    
-    logger.info(f"Member added to workspace: {workspace_slug}, user: {member_data.email}")
+    await _bump_membership_version(session, user_to_add.id)
+    await session.commit()
+    await session.refresh(membership)
+    invalidate_membership(workspace.id, user_to_add.id)
+    invalidate_workspace_lists([user_to_add.id])
+    invalidate_principal(user_to_add.email)
+    
+    logger.info("Member added to workspace: %s, user: %s", workspace_slug, member_data.email)
     return membership
 
 
 @router.get("/{workspace_slug}/members", response_model=List[WorkspaceMemberRead])
-def list_members(
+async def list_members(
     workspace_slug: str,
     request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    """List workspace members (user must be a member)"""
+    """List workspace members, oldest first (user must be a member, paginated)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -309,39 +367,31 @@ def list_members(
         )
     
     # Check if user is a member
-    membership_statement = select(WorkspaceMember).where(
-        WorkspaceMember.workspace_id == workspace.id,
-        WorkspaceMember.user_id == current_user.id
-    )
-    membership = session.exec(membership_statement).first()
-    
-    if not membership:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=get_localized_message("WORKSPACE_ACCESS_DENIED", request)
-        )
+    await require_workspace_member(session, request, workspace, current_user)
     
-    # Get all members
+    # Get one page of members
     members_statement = select(WorkspaceMember).where(
         WorkspaceMember.workspace_id == workspace.id
     )
-    members = session.exec(members_statement).all()
+    members_statement = apply_keyset_pagination(
+        members_statement, WorkspaceMember, cursor, limit, descending=False, request=request
+    )
+    members = finalize_page((await session.exec(members_statement)).all(), limit, response)
     
     return members
 
 
 @router.delete("/{workspace_slug}/members/{user_id}")
-def remove_member(
+async def remove_member(
     workspace_slug: str,
     user_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Remove member from workspace (only owner can remove members)"""
     # Get workspace by slug
-    statement = select(Workspace).where(Workspace.slug == workspace_slug)
-    workspace = session.exec(statement).first()
+    workspace = await resolve_workspace(session, workspace_slug)
     
     if not workspace:
         raise HTTPException(
@@ -361,7 +411,7 @@ def remove_member(
         WorkspaceMember.workspace_id == workspace.id,
         WorkspaceMember.user_id == user_id
     )
-    membership = session.exec(membership_statement).first()
+    membership = (await session.exec(membership_statement)).first()
     
     if not membership:
         raise HTTPException(
@@ -377,8 +427,13 @@ def remove_member(
         )
     
     # Remove member
-    session.delete(membership)
-    session.commit()
-    
-    logger.info(f"Member removed from workspace: {workspace_slug}, user_id: {user_id}")
+    await session.delete(membership)
+    member_email = await _bump_membership_version(session, user_id)
+    await session.commit()
+    invalidate_membership(workspace.id, user_id)
+    invalidate_workspace_lists([user_id])
+    if member_email:
+        invalidate_principal(member_email)
+    
+    logger.info("Member removed from workspace: %s, user_id: %s", workspace_slug, user_id)
     return {"message": get_localized_message("MEMBER_REMOVED", request)} 
\ No newline at end of file
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script to move old tool response payloads into compressed cold storage.
+
+Payloads are stored once per content hash in archived_payloads; the tool
+endpoints decompress them transparently. Run periodically (e.g. nightly).
+"""
+
+import os
+import sys
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+load_dotenv()
+
+from database import async_session, engine
+from utils.archive import (
+    ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, ARCHIVE_CODEC,
+    archive_old_payloads, prune_orphaned_payloads
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive old tool response payloads")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS,
+                        help=f"Archive payloads older than this many days (default: {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE,
+                        help=f"Rows archived per transaction (default: {ARCHIVE_BATCH_SIZE})")
+    parser.add_argument("--no-prune", action="store_true",
+                        help="Keep archived payloads no longer referenced by any row")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    print(f"📦 Archiving payloads older than {args.older_than_days} days ({ARCHIVE_CODEC})...")
+
+    async with async_session() as session:
+        results = await archive_old_payloads(session, args.older_than_days, args.batch_size)
+        for table, count in results.items():
+            print(f"{table}: {count} payload arşivlendi")
+
+        if not args.no_prune:
+            pruned = await prune_orphaned_payloads(session)
+            print(f"{pruned} orphaned payload silindi")
+
+    await engine.dispose()
+    print("🎉 İşlem tamamlandı!")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
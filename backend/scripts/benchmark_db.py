@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the database-backed API routes.
+
+Seeds users, workspaces, memberships and tool history in bulk, then replays
+each route through the FastAPI app in-process and reports p50/p95/p99 latency
+and queries per request. Run it against a disposable database:
+
+    DATABASE_URL=postgresql://localhost/gipoly_bench \\
+        python scripts/benchmark_db.py --users 100000 --analyses 1000000
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from itertools import islice
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Rate limits would dominate the numbers
+os.environ.setdefault("ENVIRONMENT", "test")
+load_dotenv()
+
+import httpx
+from sqlalchemy import event, func, insert, select
+from database import engine, init_db
+from main import app
+from models.user import User
+from models.workspace import Workspace, WorkspaceMember
+from tools.trend_agent.models import TrendSuggestion
+from tools.seo_strategist.models import SEOAnalysis
+from tools.adcreative.models import AdCreativeAnalysis
+from utils.security import create_access_token, get_password_hash
+
+# Seeded rows are recognisable by these markers
+BENCH_EMAIL_DOMAIN = "bench.gipoly.local"
+BENCH_SLUG_PREFIX = "bench-"
+
+INSERT_BATCH_SIZE = 5000
+HISTORY_SPAN_DAYS = 365
+
+# Tool history tables and their list/detail routes
+TOOL_ROUTES = {
+    TrendSuggestion: "/tools/trend-agent/suggestions",
+    SEOAnalysis: "/tools/seo-strategist/analyses",
+    AdCreativeAnalysis: "/tools/adcreative/analyses",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed a database and benchmark API routes")
+    parser.add_argument("--users", type=int, default=10000, help="Users to seed (default: 10000)")
+    parser.add_argument("--workspaces", type=int, default=None, help="Workspaces to seed (default: same as users)")
+    parser.add_argument("--members-per-workspace", type=int, default=3,
+                        help="Extra members per workspace besides the owner (default: 3)")
+    parser.add_argument("--analyses", type=int, default=100000,
+                        help="Tool history rows split across the three tool tables (default: 100000)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per route (default: 200)")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per route (default: 20)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent requests per route (default: 1)")
+    parser.add_argument("--sample", type=int, default=100, help="Distinct users/rows sampled per route (default: 100)")
+    parser.add_argument("--routes", default=None, help="Comma separated substrings; only matching routes run")
+    parser.add_argument("--skip-seed", action="store_true", help="Benchmark existing data without seeding")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write results to this JSON file")
+    return parser.parse_args()
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+def _random_created_at(now: datetime) -> datetime:
+    return now - timedelta(seconds=random.randint(0, HISTORY_SPAN_DAYS * 86400))
+
+
+async def insert_batches(table, rows) -> int:
+    """Insert an iterable of row dicts in executemany batches"""
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = list(islice(rows, INSERT_BATCH_SIZE))
+        if not batch:
+            return inserted
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+        inserted += len(batch)
+
+
+async def fetch_all(statement) -> list:
+    async with engine.connect() as conn:
+        return (await conn.execute(statement)).all()
+
+
+async def seed(args):
+    now = datetime.utcnow()
+    workspace_count = args.workspaces if args.workspaces is not None else args.users
+
+    # One bcrypt hash shared by every seeded user
+    password_hash = get_password_hash("benchmark-password")
+
+    start = time.perf_counter()
+    await insert_batches(User.__table__, (
+        {
+            "email": f"user{i}@{BENCH_EMAIL_DOMAIN}",
+            "password": password_hash,
+            "full_name": f"Bench User {i}",
+            "created_at": _random_created_at(now),
+        }
+        for i in range(args.users)
+    ))
+    user_ids = [row.id for row in await fetch_all(
+        select(User.id).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    )]
+    print(f"👤 {len(user_ids)} users ({time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    await insert_batches(Workspace.__table__, (
+        {
+            "name": f"Bench Workspace {i}",
+            "slug": f"{BENCH_SLUG_PREFIX}{i}",
+            "owner_id": random.choice(user_ids),
+            "created_at": _random_created_at(now),
+        }
+        for i in range(workspace_count)
+    ))
+    workspaces = await fetch_all(
+        select(Workspace.id, Workspace.owner_id).where(Workspace.slug.like(f"{BENCH_SLUG_PREFIX}%"))
+    )
+    print(f"🏢 {len(workspaces)} workspaces ({time.perf_counter() - start:.1f}s)")
+
+    def member_rows():
+        for workspace in workspaces:
+            yield {"workspace_id": workspace.id, "user_id": workspace.owner_id, "role": "owner", "created_at": now}
+            candidates = random.sample(user_ids, min(args.members_per_workspace + 1, len(user_ids)))
+            members = [u for u in candidates if u != workspace.owner_id][:args.members_per_workspace]
+            for user_id in members:
+                yield {
+                    "workspace_id": workspace.id,
+                    "user_id": user_id,
+                    "role": "member",
+                    "created_at": _random_created_at(now),
+                }
+
+    start = time.perf_counter()
+    members = await insert_batches(WorkspaceMember.__table__, member_rows())
+    print(f"👥 {members} memberships ({time.perf_counter() - start:.1f}s)")
+
+    def tool_rows(model, count):
+        for i in range(count):
+            workspace = random.choice(workspaces)
+            row = {
+                "workspace_id": workspace.id,
+                "user_id": workspace.owner_id,
+                "request_data": {"product_name": f"Product {i}", "target_audience": "benchmark"},
+                "response_data": {"summary": f"Benchmark result {i}", "score": random.randint(0, 100)},
+                "created_at": _random_created_at(now),
+            }
+            if model is SEOAnalysis:
+                row["analysis_type"] = random.choice(("manual", "url"))
+            yield row
+
+    per_tool = args.analyses // len(TOOL_ROUTES)
+    for model in TOOL_ROUTES:
+        start = time.perf_counter()
+        count = await insert_batches(model.__table__, tool_rows(model, per_tool))
+        print(f"🧰 {count} {model.__tablename__} ({time.perf_counter() - start:.1f}s)")
+
+
+async def has_seed_data() -> bool:
+    rows = await fetch_all(
+        select(func.count()).select_from(User).where(User.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    )
+    return rows[0][0] > 0
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+class QueryCounter:
+    """Counts statements executed on the app engine"""
+
+    def __init__(self, sync_engine):
+        self.count = 0
+        event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def _auth_headers(email: str) -> dict:
+    token = create_access_token({"sub": email}, expires_delta=timedelta(hours=2))
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def build_scenarios(sample: int) -> dict:
+    """Request specs (path, params, headers) per route, drawn from seeded data"""
+    memberships = await fetch_all(
+        select(User.email, Workspace.slug)
+        .join(WorkspaceMember, WorkspaceMember.user_id == User.id)
+        .join(Workspace, Workspace.id == WorkspaceMember.workspace_id)
+        .where(Workspace.slug.like(f"{BENCH_SLUG_PREFIX}%"))
+        .order_by(func.random())
+        .limit(sample)
+    )
+    if not memberships:
+        raise SystemExit("No benchmark data found; run without --skip-seed first")
+
+    scenarios = {
+        "GET /auth/me": [("/auth/me", None, _auth_headers(email)) for email, _ in memberships],
+        "GET /api/workspaces/": [("/api/workspaces/", None, _auth_headers(email)) for email, _ in memberships],
+        "GET /api/workspaces/{slug}": [
+            (f"/api/workspaces/{slug}", None, _auth_headers(email)) for email, slug in memberships
+        ],
+        "GET /api/workspaces/{slug}/members": [
+            (f"/api/workspaces/{slug}/members", None, _auth_headers(email)) for email, slug in memberships
+        ],
+    }
+
+    for model, path in TOOL_ROUTES.items():
+        scenarios[f"GET {path}"] = [
+            (path, {"workspace_slug": slug}, _auth_headers(email)) for email, slug in memberships
+        ]
+
+        rows = await fetch_all(
+            select(model.id, Workspace.slug, User.email)
+            .join(Workspace, Workspace.id == model.workspace_id)
+            .join(User, User.id == Workspace.owner_id)
+            .where(Workspace.slug.like(f"{BENCH_SLUG_PREFIX}%"))
+            .order_by(func.random())
+            .limit(sample)
+        )
+        if rows:
+            scenarios[f"GET {path}/{{id}}"] = [
+                (f"{path}/{row.id}", {"workspace_slug": row.slug}, _auth_headers(row.email)) for row in rows
+            ]
+
+    return scenarios
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_route(client, specs, requests: int, warmup: int, concurrency: int, counter: QueryCounter) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(spec, measure: bool):
+        nonlocal errors
+        path, params, headers = spec
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, params=params, headers=headers)
+            elapsed = time.perf_counter() - start
+        if measure:
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(send(specs[i % len(specs)], False) for i in range(warmup)))
+
+    queries_before = counter.count
+    await asyncio.gather(*(send(specs[i % len(specs)], True) for i in range(requests)))
+    queries = counter.count - queries_before
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "queries_per_request": queries / requests if requests else 0.0,
+    }
+
+
+def print_results(results: dict):
+    width = max(len(route) for route in results)
+    print(f"\n{'route'.ljust(width)}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  {'queries':>7}  {'errors':>6}")
+    for route, r in results.items():
+        print(
+            f"{route.ljust(width)}  {r['p50_ms']:8.2f}  {r['p95_ms']:8.2f}  {r['p99_ms']:8.2f}  "
+            f"{r['queries_per_request']:7.2f}  {r['errors']:6d}"
+        )
+
+
+async def main():
+    args = parse_args()
+    random.seed(args.seed)
+
+    await init_db()
+
+    if args.skip_seed:
+        print("⏭️  Seeding skipped")
+    elif await has_seed_data():
+        print("♻️  Benchmark data already present, reusing it")
+    else:
+        print("🌱 Seeding benchmark data...")
+        await seed(args)
+
+    scenarios = await build_scenarios(args.sample)
+    if args.routes:
+        wanted = [r.strip() for r in args.routes.split(",") if r.strip()]
+        scenarios = {route: specs for route, specs in scenarios.items() if any(w in route for w in wanted)}
+
+    counter = QueryCounter(engine.sync_engine)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for route, specs in scenarios.items():
+            print(f"⏱️  {route}...")
+            results[route] = await run_route(client, specs, args.requests, args.warmup, args.concurrency, counter)
+
+    print_results(results)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
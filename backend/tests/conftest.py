@@ -0,0 +1,99 @@
+import os
+
+# Settings read at import time by database.py and main.py
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ENVIRONMENT", "test")
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Every table has to be registered before create_all
+from models.user import User
+from models.workspace import Workspace, WorkspaceMember
+from models.usage import UsageCounter
+from models.archive import ArchivedPayload
+from tools.trend_agent.models import TrendSuggestion
+from tools.seo_strategist.models import SEOAnalysis
+from tools.adcreative.models import AdCreativeAnalysis
+import dependencies
+from utils.query_stats import install_query_hooks
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    """Async SQLite engine on a fresh file, so concurrent sessions use separate connections"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    install_query_hooks(engine.sync_engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def session(session_factory):
+    async with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(session_factory, monkeypatch):
+    """HTTP client for the app, with every request session on the test database"""
+    import main
+    import routers.exports
+    import utils.security
+    from database import get_session
+    from utils.rate_limiting import limiter
+    from passlib.context import CryptContext
+
+    async def get_test_session():
+        async with session_factory() as session:
+            yield session
+
+    # Route limits are counted per process and would carry over between tests
+    monkeypatch.setattr(limiter, "enabled", False)
+    # bcrypt is deliberately slow; tests only need hashing to round-trip
+    monkeypatch.setattr(utils.security, "pwd_context", CryptContext(schemes=["plaintext"]))
+    # Exports open their own sessions once the request session is released
+    monkeypatch.setattr(routers.exports, "async_session", session_factory)
+    main.app.dependency_overrides[get_session] = get_test_session
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    main.app.dependency_overrides.clear()
+
+
+async def register(client: httpx.AsyncClient, email: str, password: str = "secret-pass") -> dict:
+    """Register and log in a user; returns their Authorization header"""
+    response = await client.post("/auth/register", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def create_workspace(client: httpx.AsyncClient, headers: dict, name: str = "Acme Store") -> dict:
+    response = await client.post("/api/workspaces/", json={"name": name}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Process-wide caches must not leak rows between tests"""
+    for cache in (
+        dependencies.principal_cache,
+        dependencies.workspace_cache,
+        dependencies.membership_cache,
+        dependencies.workspace_list_cache
+    ):
+        cache.clear()
+    yield
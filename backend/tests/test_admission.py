@@ -0,0 +1,112 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from utils.admission import AdmissionController, _WorkspaceSlots
+
+WORKSPACE_ID = 7
+
+
+async def hold_slot(controller: AdmissionController, entered: asyncio.Event, release: asyncio.Event):
+    async with controller.admit(WORKSPACE_ID):
+        entered.set()
+        await release.wait()
+
+
+async def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=0, expected_service_time=5.0)
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold_slot(controller, entered, release))
+    await entered.wait()
+
+    with pytest.raises(HTTPException) as error:
+        async with controller.admit(WORKSPACE_ID):
+            pass
+
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "5"
+    assert controller.rejections == 1
+
+    release.set()
+    await holder
+
+
+async def test_queue_timeout_is_rejected_and_slots_are_discarded():
+    controller = AdmissionController(
+        "test", max_concurrency=1, max_queue=1, queue_timeout=0.05, expected_service_time=2.0
+    )
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold_slot(controller, entered, release))
+    await entered.wait()
+
+    with pytest.raises(HTTPException) as error:
+        async with controller.admit(WORKSPACE_ID):
+            pass
+
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+
+    release.set()
+    await holder
+    assert controller.snapshot()["workspaces"] == {}
+
+
+async def test_queued_request_gets_slot_when_released():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold_slot(controller, entered, release))
+    await entered.wait()
+
+    async def queued():
+        async with controller.admit(WORKSPACE_ID):
+            return True
+
+    waiter = asyncio.create_task(queued())
+    await asyncio.sleep(0)
+    assert controller.snapshot()["workspaces"][str(WORKSPACE_ID)] == {"active": 1, "waiting": 1}
+
+    release.set()
+    assert await waiter
+    await holder
+    assert controller.rejections == 0
+
+
+async def test_cancelled_waiter_does_not_leak_workspace_entry():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=10.0)
+    entered, release = asyncio.Event(), asyncio.Event()
+    holder = asyncio.create_task(hold_slot(controller, entered, release))
+    await entered.wait()
+
+    async def queued():
+        async with controller.admit(WORKSPACE_ID):
+            pass
+
+    waiter = asyncio.create_task(queued())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert controller.snapshot()["workspaces"][str(WORKSPACE_ID)] == {"active": 1, "waiting": 0}
+
+    release.set()
+    await holder
+    assert controller.snapshot()["workspaces"] == {}
+
+
+async def test_cancelled_sole_waiter_is_discarded():
+    controller = AdmissionController("test", max_concurrency=1, max_queue=1, queue_timeout=10.0)
+    # The last holder left while this request was queued; only the waiter keeps the entry alive
+    slots = controller._workspaces[WORKSPACE_ID] = _WorkspaceSlots(1)
+    await slots.semaphore.acquire()
+
+    async def queued():
+        async with controller.admit(WORKSPACE_ID):
+            pass
+
+    waiter = asyncio.create_task(queued())
+    await asyncio.sleep(0)
+    assert slots.waiting == 1
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert controller.snapshot()["workspaces"] == {}
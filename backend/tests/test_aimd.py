@@ -0,0 +1,133 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import utils.aimd
+from utils.aimd import AIMDLimiter
+
+LATENCY_TARGET = 10.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils.aimd, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def make_limiter(initial_limit: int, min_limit: int = 1, max_limit: int = 64) -> AIMDLimiter:
+    return AIMDLimiter(
+        "test", initial_limit=initial_limit, min_limit=min_limit, max_limit=max_limit, latency_target=LATENCY_TARGET
+    )
+
+
+async def call(limiter: AIMDLimiter, clock: FakeClock, duration: float = 1.0, error: BaseException = None):
+    async with limiter.slot():
+        clock.advance(duration)
+        if error:
+            raise error
+
+
+async def test_saturated_fast_calls_increase_additively(clock):
+    limiter = make_limiter(2, max_limit=3)
+
+    await call(limiter, clock)
+    assert limiter.limit == pytest.approx(2.5)
+    await call(limiter, clock)
+    assert limiter.limit == pytest.approx(2.9)
+
+    for _ in range(5):
+        await call(limiter, clock)
+    assert limiter.limit == 3
+
+
+async def test_idle_calls_do_not_raise_limit(clock):
+    limiter = make_limiter(8)
+
+    # One call at a time never uses half of a limit of 8
+    for _ in range(20):
+        await call(limiter, clock)
+
+    assert limiter.limit == 8
+
+
+async def test_busy_period_raises_limit(clock):
+    limiter = make_limiter(8)
+    release = asyncio.Event()
+
+    async def held():
+        async with limiter.slot():
+            await release.wait()
+
+    # Calls 4 to 6 start with at least half the limit in use
+    tasks = [asyncio.create_task(held()) for _ in range(6)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert limiter.limit > 8
+
+
+async def test_overload_cuts_limit_multiplicatively(clock):
+    limiter = make_limiter(8)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await call(limiter, clock, error=asyncio.TimeoutError())
+
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+async def test_latency_spike_cuts_limit(clock):
+    limiter = make_limiter(8)
+
+    await call(limiter, clock, duration=LATENCY_TARGET * limiter.spike_factor + 1)
+
+    assert limiter.limit == 4
+
+
+async def test_slow_call_below_spike_leaves_limit(clock):
+    limiter = make_limiter(2)
+
+    await call(limiter, clock, duration=LATENCY_TARGET + 1)
+
+    assert limiter.limit == 2
+
+
+async def test_calls_started_before_a_cut_do_not_cut_again(clock):
+    limiter = make_limiter(8)
+    release = asyncio.Event()
+
+    async def overloaded():
+        async with limiter.slot():
+            await release.wait()
+            raise asyncio.TimeoutError()
+
+    tasks = [asyncio.create_task(overloaded()) for _ in range(3)]
+    await asyncio.sleep(0)
+    clock.advance(1)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    assert limiter.limit == 4
+    assert limiter.decreases == 1
+
+
+async def test_limit_never_drops_below_minimum(clock):
+    limiter = make_limiter(2, min_limit=2)
+
+    with pytest.raises(ValueError):
+        await call(limiter, clock, error=ValueError("not an overload"))
+    with pytest.raises(asyncio.TimeoutError):
+        await call(limiter, clock, error=asyncio.TimeoutError())
+
+    assert limiter.limit == 2
+    assert limiter.in_flight == 0
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+from sqlmodel import select
+from models.archive import ArchivedPayload
+from tools.trend_agent.models import TrendSuggestion
+from utils.archive import (
+    ARCHIVE_CODEC,
+    archive_model_payloads,
+    compress_payload,
+    decompress_payload,
+    resolve_payloads
+)
+
+PAYLOAD = {"suggestions": [{"title": "Kışlık bot", "score": 87.5}], "category": "ayakkabı"}
+
+
+def test_compress_round_trip():
+    content_hash, data, size = compress_payload(PAYLOAD)
+
+    assert len(content_hash) == 64
+    assert size > 0
+    assert decompress_payload(ARCHIVE_CODEC, data) == PAYLOAD
+
+
+def test_equal_payloads_share_a_hash():
+    reordered = {"category": "ayakkabı", "suggestions": [{"score": 87.5, "title": "Kışlık bot"}]}
+
+    assert compress_payload(PAYLOAD)[0] == compress_payload(reordered)[0]
+
+
+async def test_archived_rows_resolve_to_original_payload(session, session_factory):
+    old = datetime.utcnow() - timedelta(days=120)
+    rows = [
+        TrendSuggestion(workspace_id=1, user_id=1, request_data={}, response_data=PAYLOAD, created_at=old),
+        TrendSuggestion(workspace_id=1, user_id=1, request_data={}, response_data=PAYLOAD, created_at=old),
+        TrendSuggestion(workspace_id=1, user_id=1, request_data={}, response_data={"fresh": True}),
+    ]
+    session.add_all(rows)
+    await session.commit()
+
+    archived = await archive_model_payloads(session, TrendSuggestion, datetime.utcnow() - timedelta(days=90))
+
+    assert archived == 2
+    stored = (await session.exec(select(ArchivedPayload))).all()
+    assert len(stored) == 1
+
+    async with session_factory() as fresh:
+        loaded = (await fresh.exec(select(TrendSuggestion).order_by(TrendSuggestion.id))).all()
+        assert [row.response_data is None for row in loaded] == [True, True, False]
+        assert await resolve_payloads(fresh, loaded) == [PAYLOAD, PAYLOAD, {"fresh": True}]
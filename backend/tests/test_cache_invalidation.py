@@ -0,0 +1,212 @@
+from dependencies import membership_cache, principal_cache, workspace_cache, workspace_list_cache
+from utils.pagination import DEFAULT_PAGE_SIZE
+from utils.cache import MISSING
+from conftest import create_workspace, register
+
+
+def cached(cache, key) -> bool:
+    return cache.get(key) is not MISSING
+
+
+async def me(client, headers) -> dict:
+    response = await client.get("/auth/me", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def workspace_with_member(client):
+    """Owner, member and their workspace, with the member's access already cached"""
+    owner = await register(client, "owner@example.com")
+    member = await register(client, "member@example.com")
+    workspace = await create_workspace(client, owner)
+    member_id = (await me(client, member))["id"]
+    response = await client.post(
+        f"/api/workspaces/{workspace['slug']}/members", json={"email": "member@example.com"}, headers=owner
+    )
+    assert response.status_code == 200
+
+    assert (await client.get(f"/api/workspaces/{workspace['slug']}", headers=member)).status_code == 200
+    assert cached(workspace_cache, workspace["slug"])
+    assert membership_cache.get((workspace["id"], member_id)) == "member"
+    return owner, member, member_id, workspace
+
+
+async def test_update_profile_evicts_principal(client):
+    headers = await register(client, "owner@example.com")
+    await me(client, headers)
+    assert cached(principal_cache, "owner@example.com")
+
+    response = await client.put("/auth/profile", json={"full_name": "Ayşe Yılmaz"}, headers=headers)
+
+    assert response.status_code == 200
+    assert not cached(principal_cache, "owner@example.com")
+    assert (await me(client, headers))["full_name"] == "Ayşe Yılmaz"
+
+
+async def test_change_password_evicts_principal(client):
+    headers = await register(client, "owner@example.com", password="old-pass")
+    await me(client, headers)
+
+    response = await client.put(
+        "/auth/change-password",
+        json={"current_password": "old-pass", "new_password": "new-pass"},
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    assert not cached(principal_cache, "owner@example.com")
+    login = await client.post("/auth/login", json={"email": "owner@example.com", "password": "new-pass"})
+    assert login.status_code == 200
+
+
+async def test_delete_account_evicts_principal(client):
+    headers = await register(client, "owner@example.com")
+    await me(client, headers)
+
+    response = await client.delete("/auth/profile", headers=headers)
+
+    assert response.status_code == 200
+    assert not cached(principal_cache, "owner@example.com")
+    assert (await client.get("/auth/me", headers=headers)).status_code == 401
+
+
+async def test_membership_changes_evict_member_principal(client):
+    owner = await register(client, "owner@example.com")
+    member = await register(client, "member@example.com")
+    workspace = await create_workspace(client, owner)
+    member_id = (await me(client, member))["id"]
+
+    response = await client.post(
+        f"/api/workspaces/{workspace['slug']}/members", json={"email": "member@example.com"}, headers=owner
+    )
+    assert response.status_code == 200
+    assert not cached(principal_cache, "member@example.com")
+
+    await me(client, member)
+    response = await client.delete(f"/api/workspaces/{workspace['slug']}/members/{member_id}", headers=owner)
+    assert response.status_code == 200
+    assert not cached(principal_cache, "member@example.com")
+
+
+async def test_update_workspace_evicts_workspace_and_roles(client):
+    owner, member, member_id, workspace = await workspace_with_member(client)
+
+    response = await client.put(
+        f"/api/workspaces/{workspace['slug']}", json={"name": "Acme Outlet"}, headers=owner
+    )
+
+    assert response.status_code == 200
+    assert not cached(workspace_cache, workspace["slug"])
+    assert not cached(membership_cache, (workspace["id"], member_id))
+    response = await client.get(f"/api/workspaces/{workspace['slug']}", headers=member)
+    assert response.json()["name"] == "Acme Outlet"
+
+
+async def test_delete_workspace_evicts_workspace_and_roles(client):
+    owner, member, member_id, workspace = await workspace_with_member(client)
+
+    response = await client.delete(f"/api/workspaces/{workspace['slug']}", headers=owner)
+
+    assert response.status_code == 200
+    assert not cached(workspace_cache, workspace["slug"])
+    assert not cached(membership_cache, (workspace["id"], member_id))
+    assert (await client.get(f"/api/workspaces/{workspace['slug']}", headers=member)).status_code == 404
+
+
+async def test_add_member_evicts_cached_denial(client):
+    owner = await register(client, "owner@example.com")
+    stranger = await register(client, "stranger@example.com")
+    workspace = await create_workspace(client, owner)
+    stranger_id = (await me(client, stranger))["id"]
+
+    assert (await client.get(f"/api/workspaces/{workspace['slug']}", headers=stranger)).status_code == 403
+    assert membership_cache.get((workspace["id"], stranger_id)) is None
+
+    response = await client.post(
+        f"/api/workspaces/{workspace['slug']}/members", json={"email": "stranger@example.com"}, headers=owner
+    )
+
+    assert response.status_code == 200
+    assert not cached(membership_cache, (workspace["id"], stranger_id))
+    assert (await client.get(f"/api/workspaces/{workspace['slug']}", headers=stranger)).status_code == 200
+
+
+async def test_remove_member_evicts_cached_role(client):
+    owner, member, member_id, workspace = await workspace_with_member(client)
+
+    response = await client.delete(f"/api/workspaces/{workspace['slug']}/members/{member_id}", headers=owner)
+
+    assert response.status_code == 200
+    assert not cached(membership_cache, (workspace["id"], member_id))
+    assert (await client.get(f"/api/workspaces/{workspace['slug']}", headers=member)).status_code == 403
+
+
+async def list_workspaces(client, headers) -> list:
+    response = await client.get("/api/workspaces/", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_create_workspace_evicts_owner_list(client):
+    owner = await register(client, "owner@example.com")
+    owner_id = (await me(client, owner))["id"]
+    assert await list_workspaces(client, owner) == []
+    assert cached(workspace_list_cache, (owner_id, DEFAULT_PAGE_SIZE))
+
+    await create_workspace(client, owner)
+
+    assert not cached(workspace_list_cache, (owner_id, DEFAULT_PAGE_SIZE))
+    assert len(await list_workspaces(client, owner)) == 1
+
+
+async def test_workspace_changes_evict_every_member_list(client):
+    owner, member, member_id, workspace = await workspace_with_member(client)
+    owner_id = (await me(client, owner))["id"]
+    await list_workspaces(client, owner)
+    await list_workspaces(client, member)
+
+    response = await client.put(
+        f"/api/workspaces/{workspace['slug']}", json={"name": "Acme Outlet"}, headers=owner
+    )
+    assert response.status_code == 200
+    assert not cached(workspace_list_cache, (owner_id, DEFAULT_PAGE_SIZE))
+    assert not cached(workspace_list_cache, (member_id, DEFAULT_PAGE_SIZE))
+    assert [w["name"] for w in await list_workspaces(client, member)] == ["Acme Outlet"]
+
+    await list_workspaces(client, owner)
+    response = await client.delete(f"/api/workspaces/{workspace['slug']}", headers=owner)
+    assert response.status_code == 200
+    assert not cached(workspace_list_cache, (owner_id, DEFAULT_PAGE_SIZE))
+    assert not cached(workspace_list_cache, (member_id, DEFAULT_PAGE_SIZE))
+    assert await list_workspaces(client, member) == []
+
+
+async def test_membership_changes_evict_member_list(client):
+    owner = await register(client, "owner@example.com")
+    member = await register(client, "member@example.com")
+    workspace = await create_workspace(client, owner)
+    member_id = (await me(client, member))["id"]
+    assert await list_workspaces(client, member) == []
+
+    response = await client.post(
+        f"/api/workspaces/{workspace['slug']}/members", json={"email": "member@example.com"}, headers=owner
+    )
+    assert response.status_code == 200
+    assert not cached(workspace_list_cache, (member_id, DEFAULT_PAGE_SIZE))
+    assert [w["user_role"] for w in await list_workspaces(client, member)] == ["member"]
+
+    response = await client.delete(f"/api/workspaces/{workspace['slug']}/members/{member_id}", headers=owner)
+    assert response.status_code == 200
+    assert not cached(workspace_list_cache, (member_id, DEFAULT_PAGE_SIZE))
+    assert await list_workspaces(client, member) == []
+
+
+async def test_delete_account_evicts_own_list(client):
+    headers = await register(client, "owner@example.com")
+    user_id = (await me(client, headers))["id"]
+    await list_workspaces(client, headers)
+
+    response = await client.delete("/auth/profile", headers=headers)
+
+    assert response.status_code == 200
+    assert not cached(workspace_list_cache, (user_id, DEFAULT_PAGE_SIZE))
@@ -0,0 +1,125 @@
+from fastapi import Response
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import delete, update
+from starlette.requests import Request
+import routers.auth
+from dependencies import TOKEN_REFRESH_HEADER, get_current_user, get_workspace_role
+from models.user import User
+from models.workspace import Workspace, WorkspaceMember
+from routers.auth import _issue_access_token
+from utils.query_stats import start_query_tracking
+from utils.security import create_access_token, decode_access_token, membership_claims
+
+
+def make_request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+async def authenticate(session, token: str):
+    request, response = make_request(), Response()
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    user = await get_current_user(request, response, credentials, session)
+    return user, request, response
+
+
+async def create_membership(session_factory):
+    """An editor of a workspace owned by someone else"""
+    async with session_factory() as session:
+        owner = User(email="owner@example.com", password="hashed")
+        member = User(email="editor@example.com", password="hashed")
+        session.add_all([owner, member])
+        await session.flush()
+        workspace = Workspace(name="Acme Store", slug="acme-store", owner_id=owner.id)
+        session.add(workspace)
+        await session.flush()
+        session.add(WorkspaceMember(workspace_id=workspace.id, user_id=member.id, role="editor"))
+        await session.commit()
+        return member, workspace
+
+
+def token_for(user: User, workspace: Workspace, membership_version: int) -> str:
+    claims = membership_claims(user.id, membership_version, [(workspace.slug, workspace.id, "editor")])
+    return create_access_token({"sub": user.email, **claims})
+
+
+async def bump_membership_version(session_factory, user: User):
+    async with session_factory() as session:
+        await session.exec(update(User).where(User.id == user.id).values(membership_version=1))
+        await session.commit()
+
+
+async def test_current_claims_are_trusted(session_factory):
+    member, workspace = await create_membership(session_factory)
+
+    async with session_factory() as session:
+        user, request, response = await authenticate(session, token_for(member, workspace, 0))
+        role = await get_workspace_role(session, request, workspace, user)
+
+    assert role == "editor"
+    assert request.state.workspace_claims == {"acme-store": [workspace.id, "editor"]}
+    assert TOKEN_REFRESH_HEADER not in response.headers
+
+
+async def test_claims_are_not_checked_outside_workspace_routes(session_factory):
+    member, workspace = await create_membership(session_factory)
+    token = token_for(member, workspace, 0)
+
+    async with session_factory() as session:
+        await authenticate(session, token)
+
+        # The principal is cached now; authenticating again reads nothing
+        stats = start_query_tracking()
+        await authenticate(session, token)
+
+    assert stats.count == 0
+
+
+async def test_membership_change_forces_refresh_despite_cached_principal(session_factory):
+    member, workspace = await create_membership(session_factory)
+    token = token_for(member, workspace, 0)
+    async with session_factory() as session:
+        await authenticate(session, token)
+
+    # Another worker removes the membership; this worker's principal cache is not told
+    async with session_factory() as session:
+        await session.exec(delete(WorkspaceMember).where(WorkspaceMember.user_id == member.id))
+        await session.commit()
+    await bump_membership_version(session_factory, member)
+
+    async with session_factory() as session:
+        user, request, response = await authenticate(session, token)
+        role = await get_workspace_role(session, request, workspace, user)
+
+    assert role is None
+    assert request.state.workspace_claims is None
+    assert response.headers[TOKEN_REFRESH_HEADER] == "true"
+
+
+async def test_refreshed_token_carries_current_version(session_factory, monkeypatch):
+    monkeypatch.setattr(routers.auth, "JWT_MEMBERSHIP_CLAIMS", True)
+    member, workspace = await create_membership(session_factory)
+    async with session_factory() as session:
+        await authenticate(session, token_for(member, workspace, 0))
+
+    await bump_membership_version(session_factory, member)
+
+    async with session_factory() as session:
+        # The principal still says version 0; the token must not
+        user, _, _ = await authenticate(session, token_for(member, workspace, 0))
+        assert user.membership_version == 0
+        claims = decode_access_token(await _issue_access_token(session, user))
+
+    assert claims["mv"] == 1
+    assert claims["ws"] == {"acme-store": [workspace.id, "editor"]}
+
+
+async def test_token_without_claims_falls_back_to_lookups(session_factory):
+    member, workspace = await create_membership(session_factory)
+
+    async with session_factory() as session:
+        user, request, response = await authenticate(session, create_access_token({"sub": member.email}))
+        role = await get_workspace_role(session, request, workspace, user)
+
+    assert role == "editor"
+    assert request.state.workspace_claims is None
+    assert TOKEN_REFRESH_HEADER not in response.headers
@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timedelta, timezone
+from routers.exports import _naive_utc
+from tools.trend_agent.models import TrendSuggestion
+from conftest import create_workspace, register
+
+ISTANBUL = timezone(timedelta(hours=3))
+
+
+def test_naive_utc():
+    assert _naive_utc(None) is None
+    assert _naive_utc(datetime(2024, 5, 1, 12)) == datetime(2024, 5, 1, 12)
+    assert _naive_utc(datetime(2024, 5, 1, 15, tzinfo=ISTANBUL)) == datetime(2024, 5, 1, 12)
+
+
+async def test_aware_since_and_until_filter_in_utc(client, session_factory):
+    headers = await register(client, "owner@example.com")
+    workspace = await create_workspace(client, headers)
+
+    # Stored as naive UTC: 10:00, 12:00 and 14:00
+    async with session_factory() as session:
+        session.add_all([
+            TrendSuggestion(
+                workspace_id=workspace["id"],
+                user_id=workspace["owner_id"],
+                request_data={"hour": hour},
+                created_at=datetime(2024, 5, 1, hour)
+            )
+            for hour in (10, 12, 14)
+        ])
+        await session.commit()
+
+    # 14:30+03:00 is 11:30 UTC and 16:30+03:00 is 13:30 UTC
+    response = await client.get(
+        f"/api/workspaces/{workspace['slug']}/export",
+        params={
+            "tools": "trend-agent",
+            "since": "2024-05-01T14:30:00+03:00",
+            "until": "2024-05-01T16:30:00+03:00",
+        },
+        headers=headers
+    )
+
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["request_data"] for record in records] == [{"hour": 12}]
+
+
+async def test_utc_designator_matches_naive_bounds(client, session_factory):
+    headers = await register(client, "owner@example.com")
+    workspace = await create_workspace(client, headers)
+    async with session_factory() as session:
+        session.add(TrendSuggestion(
+            workspace_id=workspace["id"],
+            user_id=workspace["owner_id"],
+            request_data={},
+            created_at=datetime(2024, 5, 1, 12)
+        ))
+        await session.commit()
+
+    exports = []
+    for since in ("2024-05-01T12:00:00Z", "2024-05-01T12:00:00"):
+        response = await client.get(
+            f"/api/workspaces/{workspace['slug']}/export",
+            params={"tools": "trend-agent", "since": since},
+            headers=headers
+        )
+        exports.append(len(response.text.splitlines()))
+
+    assert exports == [1, 1]
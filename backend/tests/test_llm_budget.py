@@ -0,0 +1,164 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+import utils.llm
+import utils.llm_budget
+from utils.llm import generate_content
+from utils.llm_budget import LLMBudgetExceeded, TokenBudget, estimate_tokens
+
+TOKENS_PER_MINUTE = 6000
+REQUESTS_PER_MINUTE = 60
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(utils.llm_budget, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Seconds passed to asyncio.sleep, which returns at once"""
+    recorded = []
+
+    async def sleep(seconds):
+        recorded.append(seconds)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return recorded
+
+
+@pytest.fixture
+def budget(clock):
+    return TokenBudget(TOKENS_PER_MINUTE, REQUESTS_PER_MINUTE, max_wait=10)
+
+
+def test_estimate_includes_expected_output():
+    assert estimate_tokens("x" * 400) == 100 + utils.llm_budget.LLM_EXPECTED_OUTPUT_TOKENS
+
+
+async def test_reserve_within_budget_does_not_wait(budget, sleeps):
+    await budget.acquire(1000)
+
+    assert sleeps == []
+    assert budget.snapshot()["tokens_available"] == 5000
+    assert budget.snapshot()["requests_available"] == 59
+
+
+async def test_short_budget_waits_for_refill(budget, sleeps):
+    await budget.acquire(6000)
+    # 100 tokens refill per second, so 500 more tokens take 5 seconds
+    await budget.acquire(500)
+
+    assert sleeps == [pytest.approx(5.0)]
+
+
+async def test_budget_refills_over_time(budget, clock, sleeps):
+    await budget.acquire(6000)
+    clock.advance(30)
+
+    await budget.acquire(3000)
+
+    assert sleeps == []
+
+
+async def test_wait_beyond_max_is_rejected_with_retry_after(budget, sleeps):
+    await budget.acquire(6000)
+
+    with pytest.raises(LLMBudgetExceeded) as error:
+        await budget.acquire(2000)
+
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "20"
+    assert budget.rejections == 1
+    # A rejected call spends nothing
+    assert budget.snapshot()["tokens_available"] == 0
+
+
+async def test_request_bucket_limits_calls(clock, sleeps):
+    budget = TokenBudget(TOKENS_PER_MINUTE, 2, max_wait=10)
+    await budget.acquire(1)
+    await budget.acquire(1)
+
+    with pytest.raises(LLMBudgetExceeded) as error:
+        await budget.acquire(1)
+
+    assert error.value.retry_after == 30
+
+
+async def test_reconcile_credits_unused_tokens(budget, sleeps):
+    await budget.acquire(3000)
+
+    await budget.reconcile(3000, 1200)
+    assert budget.snapshot()["tokens_available"] == 4800
+
+    # Credits never exceed the per-minute capacity
+    await budget.reconcile(10000, 0)
+    assert budget.snapshot()["tokens_available"] == TOKENS_PER_MINUTE
+
+
+async def test_reconcile_charges_overruns(budget, sleeps):
+    await budget.acquire(1000)
+
+    await budget.reconcile(1000, 2500)
+
+    assert budget.snapshot()["tokens_available"] == 3500
+
+
+async def test_drain_stops_spending_until_refill(budget, clock, sleeps):
+    await budget.drain()
+
+    with pytest.raises(LLMBudgetExceeded):
+        await budget.acquire(2000)
+
+    clock.advance(20)
+    await budget.acquire(2000)
+    assert sleeps == []
+
+
+class FakeModel:
+    model_name = "models/gemini-test"
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return SimpleNamespace(text="ok", usage_metadata=None)
+
+
+async def test_generate_content_fails_fast_when_budget_is_exhausted(budget, monkeypatch, sleeps):
+    monkeypatch.setattr(utils.llm, "gemini_budget", budget)
+    await budget.drain()
+    model = FakeModel()
+
+    with pytest.raises(LLMBudgetExceeded) as error:
+        await generate_content(model, "x" * 400)
+
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+    assert model.calls == 0
+
+
+async def test_upstream_quota_error_drains_budget(budget, monkeypatch, sleeps):
+    monkeypatch.setattr(utils.llm, "gemini_budget", budget)
+    model = FakeModel(error=RuntimeError("429 Quota exceeded"))
+
+    with pytest.raises(LLMBudgetExceeded) as error:
+        await generate_content(model, "hello")
+
+    assert error.value.retry_after == utils.llm.QUOTA_BACKOFF_SECONDS
+    assert budget.snapshot()["tokens_available"] == 0
+    assert model.calls == 1
@@ -0,0 +1,70 @@
+import logging
+import queue
+import pytest
+from utils import logging_config
+from utils.logging_config import BoundedQueueHandler, _queue_handlers, stop_logging
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def queued_logger():
+    """A non-propagating logger routed through a bounded queue to a collecting handler"""
+    logger = logging.getLogger("tests.queued")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = CollectingHandler()
+    _queue_handlers(logger, handler)
+    yield logger, handler
+    stop_logging()
+    logger.handlers.clear()
+
+
+def test_stop_flushes_queued_records(queued_logger):
+    logger, handler = queued_logger
+    logger.info("before stop")
+
+    stop_logging()
+
+    assert handler.messages == ["before stop"]
+
+
+def test_records_after_stop_reach_real_handlers(queued_logger):
+    logger, handler = queued_logger
+
+    stop_logging()
+    logger.info("after stop")
+
+    assert handler.messages == ["after stop"]
+    assert handler in logger.handlers
+    assert not any(isinstance(h, BoundedQueueHandler) for h in logger.handlers)
+    assert logging_config.get_logging_status()["queues"] == []
+
+
+def test_dropped_records_are_logged_after_stop(queued_logger, caplog):
+    logger, _ = queued_logger
+    queue_handler = next(h for h in logger.handlers if isinstance(h, BoundedQueueHandler))
+    queue_handler.dropped = 3
+
+    with caplog.at_level(logging.WARNING, logger="utils.logging_config"):
+        stop_logging()
+
+    assert "Logging dropped 3 records (queue full)" in caplog.messages
+
+
+def test_full_queue_drops_records(monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_QUEUE_BLOCK_TIMEOUT", 0.01)
+    queue_handler = BoundedQueueHandler(queue.Queue(maxsize=1), block=False)
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "message", None, None)
+
+    queue_handler.enqueue(record)
+    queue_handler.enqueue(record)
+
+    assert queue_handler.dropped == 1
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+import utils.cache
+import utils.login_attempts
+import utils.rate_limiting
+from utils.login_attempts import LoginAttemptStore, MemoryLoginAttemptStore
+from utils.rate_limiting import MAX_LOGIN_ATTEMPTS, check_login_attempts, record_failed_login, record_successful_login
+
+WINDOW = 300
+
+
+class FakeClock:
+    """Stands in for the time module in the store and its cache"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    fake_time = SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now)
+    monkeypatch.setattr(utils.login_attempts, "time", fake_time)
+    monkeypatch.setattr(utils.cache, "time", fake_time)
+    return clock
+
+
+@pytest.fixture
+def store(clock, monkeypatch):
+    store = MemoryLoginAttemptStore(WINDOW)
+    monkeypatch.setattr(utils.rate_limiting, "login_attempt_store", store)
+    return store
+
+
+def test_store_interface_is_abstract():
+    with pytest.raises(TypeError):
+        LoginAttemptStore(WINDOW)
+
+
+async def test_failures_count_within_window(store, clock):
+    assert await store.increment("a@example.com") == 1
+    clock.advance(100)
+    assert await store.increment("a@example.com") == 2
+
+    # The window runs from the first failure, not the latest
+    assert await store.get("a@example.com") == (2, WINDOW - 100)
+
+
+async def test_failures_expire_with_window(store, clock):
+    await store.increment("a@example.com")
+    clock.advance(WINDOW)
+
+    assert await store.get("a@example.com") == (0, 0)
+    assert await store.increment("a@example.com") == 1
+
+
+async def test_reset_forgets_failures(store):
+    await store.increment("a@example.com")
+    await store.reset("a@example.com")
+
+    assert await store.get("a@example.com") == (0, 0)
+
+
+async def test_store_stays_bounded(clock):
+    store = MemoryLoginAttemptStore(WINDOW, maxsize=2)
+    for email in ("a@example.com", "b@example.com", "c@example.com"):
+        await store.increment(email)
+
+    assert len(store._entries) == 2
+    assert await store.get("a@example.com") == (0, 0)
+    assert (await store.get("c@example.com"))[0] == 1
+
+
+async def test_login_blocked_after_max_attempts(store, clock):
+    for _ in range(MAX_LOGIN_ATTEMPTS - 1):
+        await record_failed_login("a@example.com")
+    assert await check_login_attempts("a@example.com")
+
+    await record_failed_login("a@example.com")
+    with pytest.raises(HTTPException) as error:
+        await check_login_attempts("a@example.com")
+    assert error.value.status_code == 429
+
+    clock.advance(WINDOW)
+    assert await check_login_attempts("a@example.com")
+
+
+async def test_successful_login_clears_block(store):
+    for _ in range(MAX_LOGIN_ATTEMPTS):
+        await record_failed_login("a@example.com")
+
+    await record_successful_login("a@example.com")
+
+    assert await check_login_attempts("a@example.com")
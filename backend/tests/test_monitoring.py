@@ -0,0 +1,50 @@
+import pytest
+import routers.monitoring
+
+TOKEN = "scrape-secret"
+
+
+@pytest.fixture
+def monitoring_token(monkeypatch):
+    monkeypatch.setattr(routers.monitoring, "MONITORING_TOKEN", TOKEN)
+    return TOKEN
+
+
+@pytest.mark.parametrize("headers", [
+    {"X-Monitoring-Token": TOKEN},
+    {"Authorization": f"Bearer {TOKEN}"},
+    {"Authorization": f"bearer {TOKEN}"},
+])
+async def test_metrics_accepts_monitoring_token(client, monitoring_token, headers):
+    response = await client.get("/metrics", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds" in response.text
+
+
+@pytest.mark.parametrize("headers", [
+    {},
+    {"X-Monitoring-Token": "wrong"},
+    {"Authorization": "Bearer wrong"},
+    {"Authorization": f"Basic {TOKEN}"},
+])
+async def test_metrics_rejects_other_credentials(client, monitoring_token, headers):
+    response = await client.get("/metrics", headers=headers)
+
+    assert response.status_code == 403
+
+
+async def test_monitoring_denied_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(routers.monitoring, "MONITORING_TOKEN", None)
+
+    response = await client.get("/metrics", headers={"Authorization": "Bearer "})
+
+    assert response.status_code == 403
+
+
+async def test_bearer_token_opens_monitoring_routes(client, monitoring_token):
+    response = await client.get("/monitoring/llm-budget", headers={"Authorization": f"Bearer {TOKEN}"})
+
+    assert response.status_code == 200
+    assert response.json()["backend"] == "memory"
@@ -0,0 +1,40 @@
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException, Response
+from utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, finalize_page
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 17, 13, 45, 9, 123456)
+
+    cursor = encode_cursor(created_at, 4821)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, 4821)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "", encode_cursor(datetime(2024, 1, 1), 1)[:-3]])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_finalize_page_advertises_last_row():
+    rows = [SimpleNamespace(id=i, created_at=datetime(2024, 1, i)) for i in range(3, 0, -1)]
+    response = Response()
+
+    page = finalize_page(rows, 2, response)
+
+    assert [row.id for row in page] == [3, 2]
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER]) == (datetime(2024, 1, 2), 2)
+
+
+def test_finalize_page_without_more_rows():
+    response = Response()
+
+    page = finalize_page([SimpleNamespace(id=1, created_at=datetime(2024, 1, 1))], 2, response)
+
+    assert len(page) == 1
+    assert NEXT_CURSOR_HEADER not in response.headers
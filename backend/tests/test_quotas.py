@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime, timedelta
+import anyio
+from sqlalchemy import func
+from sqlmodel import select
+from models.usage import UsageCounter
+from tools.trend_agent.models import TrendSuggestion
+from utils.quotas import (
+    WORKSPACE_SCOPE,
+    TREND_SUGGESTIONS,
+    QUOTA_RECONCILE_AFTER,
+    reserve_quota,
+    release_failed_reservation
+)
+
+WORKSPACE_ID = 1
+LIMIT = 3
+
+
+def count_suggestions():
+    return select(func.count()).select_from(TrendSuggestion).where(TrendSuggestion.workspace_id == WORKSPACE_ID)
+
+
+async def reserve(session_factory) -> bool:
+    async with session_factory() as session:
+        reserved = await reserve_quota(
+            session, WORKSPACE_SCOPE, WORKSPACE_ID, TREND_SUGGESTIONS, LIMIT, count_suggestions()
+        )
+        await session.commit()
+        return reserved
+
+
+async def used(session_factory) -> int:
+    async with session_factory() as session:
+        statement = select(UsageCounter.used).where(
+            UsageCounter.scope == WORKSPACE_SCOPE,
+            UsageCounter.scope_id == WORKSPACE_ID,
+            UsageCounter.resource == TREND_SUGGESTIONS
+        )
+        return (await session.exec(statement)).one()
+
+
+async def test_first_reservation_seeds_counter(session_factory):
+    assert await reserve(session_factory)
+    assert await used(session_factory) == 1
+
+
+async def test_concurrent_reservations_never_exceed_limit(session_factory):
+    # Seed the counter, then race more requests than there are units left
+    assert await reserve(session_factory)
+
+    results = await asyncio.gather(*(reserve(session_factory) for _ in range(6)))
+
+    assert results.count(True) == LIMIT - 1
+    assert await used(session_factory) == LIMIT
+
+
+async def test_failed_work_releases_reservation(session_factory):
+    assert await reserve(session_factory)
+
+    async with session_factory() as session:
+        await release_failed_reservation(session, WORKSPACE_SCOPE, WORKSPACE_ID, TREND_SUGGESTIONS)
+
+    assert await used(session_factory) == 0
+
+
+async def test_release_survives_cancellation(session_factory):
+    assert await reserve(session_factory)
+
+    async with session_factory() as session:
+        with anyio.CancelScope() as scope:
+            scope.cancel()
+            await release_failed_reservation(session, WORKSPACE_SCOPE, WORKSPACE_ID, TREND_SUGGESTIONS)
+
+    assert await used(session_factory) == 0
+
+
+async def test_stale_counter_is_reconciled_when_denied(session_factory):
+    # A counter at the limit with no rows behind it: units leaked by crashed requests
+    async with session_factory() as session:
+        session.add(UsageCounter(
+            scope=WORKSPACE_SCOPE,
+            scope_id=WORKSPACE_ID,
+            resource=TREND_SUGGESTIONS,
+            used=LIMIT,
+            updated_at=datetime.utcnow() - QUOTA_RECONCILE_AFTER - timedelta(minutes=1)
+        ))
+        await session.commit()
+
+    assert await reserve(session_factory)
+    assert await used(session_factory) == 1
+
+
+async def test_recent_counter_is_not_reconciled(session_factory):
+    # Reservations still in flight keep a recently touched counter at the limit
+    async with session_factory() as session:
+        session.add(UsageCounter(
+            scope=WORKSPACE_SCOPE, scope_id=WORKSPACE_ID, resource=TREND_SUGGESTIONS, used=LIMIT
+        ))
+        await session.commit()
+
+    assert not await reserve(session_factory)
+    assert await used(session_factory) == LIMIT
@@ -7,6 +7,11 @@ import uuid
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
+from utils.llm import generate_content, generate_images
+from utils.metrics import track_upstream
+from utils.tracing import span
+from utils.tool_runs import record_retry
+from utils.llm_budget import LLMBudgetExceeded
 
 import vertexai
 from vertexai.preview.vision_models import ImageGenerationModel
@@ -31,7 +36,8 @@ class AdCreativeAgent:
         self.model = genai.GenerativeModel('gemini-2.0-flash')
         
         # Initialize Vertex AI
-        self._setup_vertex_ai()
+        with span("credentials"):
+            self._setup_vertex_ai()
     
     def _setup_vertex_ai(self):
         """Setup Vertex AI client with Google Drive credentials."""
@@ -108,10 +114,12 @@ class AdCreativeAgent:
         """
         try:
             # Step 1: Generate text content with Gemini
-            text_result = await self._generate_text_content(request)
+            with span("adcreative.text"):
+                text_result = await self._generate_text_content(request)
             
             # Step 2: Generate image with Vertex AI
-            image_url = await self._generate_ad_image(request)
+            with span("adcreative.image"):
+                image_url = await self._generate_ad_image(request)
             
             # Step 3: Combine results
             return AdCreativeResult(
@@ -132,6 +140,8 @@ class AdCreativeAgent:
                 image_url=image_url
             )
             
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             raise Exception(f"Ad campaign generation failed: {str(e)}")
     
@@ -160,10 +170,12 @@ class AdCreativeAgent:
                 audience_interests=audience_interests
             )
             
-            response = await self.model.generate_content_async(prompt)
-            response_data = parse_ai_response(response.text)
+            response = await generate_content(self.model, prompt)
+            with span("parse"):
+                response_data = parse_ai_response(response.text)
+                valid = validate_ad_creative_response(response_data)
             
-            if validate_ad_creative_response(response_data):
+            if valid:
                 return response_data
             else:
                 raise Exception("Invalid response structure from AI")
@@ -189,15 +201,16 @@ class AdCreativeAgent:
             parent = f"projects/{project_id}/locations/{location}"
             
             # Translate to English
-            response = translate_client.translate_text(
-                request={
-                    "parent": parent,
-                    "contents": [text],
-                    "mime_type": "text/plain",
-                    "source_language_code": "tr",
-                    "target_language_code": "en",
-                }
-            )
+            with track_upstream("translate"):
+                response = translate_client.translate_text(
+                    request={
+                        "parent": parent,
+                        "contents": [text],
+                        "mime_type": "text/plain",
+                        "source_language_code": "tr",
+                        "target_language_code": "en",
+                    }
+                )
             
             # Get translated text
             translated_text = response.translations[0].translated_text
@@ -253,7 +266,8 @@ class AdCreativeAgent:
             
             # Generate image with parameters (try-catch for compatibility)
             try:
-                response = model.generate_images(
+                response = await generate_images(
+                    model,
                     prompt=prompt,
                     number_of_images=1,
                     language="en",
@@ -263,7 +277,9 @@ class AdCreativeAgent:
                 )
             except TypeError as e:
                 # Fallback to basic parameters if advanced parameters not supported
-                response = model.generate_images(
+                record_retry()
+                response = await generate_images(
+                    model,
                     prompt=prompt,
                     number_of_images=1
                 )
@@ -302,11 +318,10 @@ class AdCreativeAgent:
             filename = f"adcreative_{uuid.uuid4()}.png"
             blob = bucket.blob(filename)
             
-            # Upload image data
-            blob.upload_from_string(image_data, content_type='image/png')
-            
-            # Make blob publicly readable
-            blob.make_public()
+            # Upload image data and make it publicly readable
+            with track_upstream("gcs_upload"):
+                blob.upload_from_string(image_data, content_type='image/png')
+                blob.make_public()
             
             # Return public URL
             return blob.public_url
@@ -2,15 +2,28 @@
 Router for AdCreative endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
 from datetime import datetime
-from database import get_session
+from database import get_session, release_connection
 from dependencies import get_current_user, get_current_workspace
 from models.user import User
 from models.workspace import Workspace
 from utils.localization import get_localized_message, get_language_from_request
+from utils.quotas import (
+    WORKSPACE_SCOPE, AD_CAMPAIGNS, AD_CAMPAIGN_LIMIT, reserve_quota, release_quota,
+    release_failed_reservation
+)
+from utils.rate_limiting import (
+    limiter, user_key, workspace_key, ADCREATIVE_RATE_LIMIT_USER, ADCREATIVE_RATE_LIMIT_WORKSPACE
+)
+from utils.tool_runs import tool_run
+from utils.admission import adcreative_admission
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset_pagination, finalize_page
+from utils.payloads import parse_response_fields, response_field_columns, response_fields_from_row
+from utils.archive import load_archived_payloads, resolve_payloads, resolve_response_data
 from .schemas import (
     AdCreativeRequest, AdCreativeResult, AdCreativeAnalysisRead
 )
@@ -21,63 +34,74 @@ router = APIRouter(prefix="/tools/adcreative", tags=["adcreative"])
 
 
 @router.post("/", response_model=AdCreativeResult)
+@limiter.limit(ADCREATIVE_RATE_LIMIT_USER, key_func=user_key)
+@limiter.limit(ADCREATIVE_RATE_LIMIT_WORKSPACE, key_func=workspace_key)
 async def generate_ad_campaign(
-    request: AdCreativeRequest,
+    request: Request,
+    payload: AdCreativeRequest,
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session),
-    http_request: Request = None
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Generate a complete advertising campaign including text and image.
     """
     try:
-        # Initialize AdCreativeAgent
-        agent = AdCreativeAgent()
-        
-        # Check workspace limit (max 3 analyses per workspace)
-        existing_analyses = db.exec(
-            select(AdCreativeAnalysis)
-            .where(AdCreativeAnalysis.workspace_id == current_workspace.id)
-        ).all()
+        # Reserve one of the workspace's 3 campaigns before generating
+        reserved = await reserve_quota(
+            db, WORKSPACE_SCOPE, current_workspace.id, AD_CAMPAIGNS, AD_CAMPAIGN_LIMIT,
+            count_existing=select(func.count()).select_from(AdCreativeAnalysis).where(
+                AdCreativeAnalysis.workspace_id == current_workspace.id
+            )
+        )
         
-        if len(existing_analyses) >= 3:
+        if not reserved:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=get_localized_message("workspace_limit_reached", http_request) or "Workspace limit reached. Maximum 3 campaigns allowed per workspace."
+                detail=get_localized_message("workspace_limit_reached", request)
             )
+        await db.commit()
         
-        # Get user's language preference
-        language = get_language_from_request(http_request) if http_request else "en"
-        
-        # Generate campaign
-        response = await agent.generate_ad_campaign(request)
+        workspace_id = current_workspace.id
+        user_id = current_user.id
         
-        # Save to database
-        import json
-        
-        # Store as JSON strings with character preservation
-        request_data = json.dumps(request.dict(), ensure_ascii=False)
-        response_data = json.dumps(response.dict(), ensure_ascii=False)
-        
-        analysis = AdCreativeAnalysis(
-            workspace_id=current_workspace.id,
-            user_id=current_user.id,
-            request_data=request_data,
-            response_data=response_data
-        )
+        # Don't hold a pooled connection during credential setup and generation
+        await release_connection(db)
         
         try:
+            # Wait for one of the workspace's generation slots
+            async with adcreative_admission.admit(workspace_id, request):
+                with tool_run() as run:
+                    # Initialize AdCreativeAgent
+                    agent = AdCreativeAgent()
+                    
+                    # Get user's language preference
+                    language = get_language_from_request(request)
+                    
+                    # Generate campaign
+                    response = await agent.generate_ad_campaign(payload)
+            
+            # Save to database as native JSON
+            analysis = AdCreativeAnalysis(
+                workspace_id=workspace_id,
+                user_id=user_id,
+                request_data=payload.model_dump(mode="json"),
+                response_data=response.model_dump(mode="json"),
+                **run.fields()
+            )
+            
             db.add(analysis)
-            db.commit()
-            db.refresh(analysis)
-        except Exception as e:
-            db.rollback()
+            await db.commit()
+        except BaseException:
+            # Give the reserved campaign back, also when the request is cancelled
+            await release_failed_reservation(db, WORKSPACE_SCOPE, workspace_id, AD_CAMPAIGNS)
             raise
         
         return response
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -86,54 +110,79 @@ async def generate_ad_campaign(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=get_localized_message("adcreative_generation_error", http_request)
+            detail=get_localized_message("adcreative_generation_error", request)
         )
 
 
 @router.get("/analyses", response_model=List[AdCreativeAnalysisRead])
 async def get_workspace_analyses(
     workspace_slug: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma separated response_data fields to return, e.g. 'headlines,image_url'"),
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session),
+    http_request: Request = None
 ):
     """
-    Get all AdCreative analyses for the current workspace.
+    List AdCreative analyses for the current workspace.
+    
+    Results are paginated newest first; follow the X-Next-Cursor header for
+    the next page. With `fields`, only those keys of response_data are
+    extracted by the database.
     """
-    analyses = db.exec(
-        select(AdCreativeAnalysis)
-        .where(AdCreativeAnalysis.workspace_id == current_workspace.id)
-        .order_by(AdCreativeAnalysis.created_at.desc())
-    ).all()
+    response_fields = parse_response_fields(fields, AdCreativeResult.model_fields, http_request)
     
-    # Decode characters from database
-    import json
-    decoded_analyses = []
-    for a in analyses:
-        # Decode request_data
-        if isinstance(a.request_data, str):
-            request_data = json.loads(a.request_data)
-        else:
-            request_data = a.request_data
-            
-        # Decode response_data
-        if isinstance(a.response_data, str):
-            response_data = json.loads(a.response_data)
-        else:
-            response_data = a.response_data
-            
-        decoded_analyses.append(
+    if response_fields is None:
+        analyses = finalize_page((await db.exec(
+            apply_keyset_pagination(
+                select(AdCreativeAnalysis).where(AdCreativeAnalysis.workspace_id == current_workspace.id),
+                AdCreativeAnalysis, cursor, limit, request=http_request
+            )
+        )).all(), limit, response)
+        payloads = await resolve_payloads(db, analyses)
+        
+        return [
             AdCreativeAnalysisRead(
                 id=a.id,
                 workspace_id=a.workspace_id,
                 user_id=a.user_id,
-                request_data=request_data,
-                response_data=response_data,
+                request_data=a.request_data,
+                response_data=payload,
                 created_at=a.created_at
             )
+            for a, payload in zip(analyses, payloads)
+        ]
+    
+    rows = finalize_page((await db.exec(
+        apply_keyset_pagination(
+            select(
+                AdCreativeAnalysis.id,
+                AdCreativeAnalysis.workspace_id,
+                AdCreativeAnalysis.user_id,
+                AdCreativeAnalysis.request_data,
+                AdCreativeAnalysis.created_at,
+                AdCreativeAnalysis.response_archive_hash,
+                *response_field_columns(AdCreativeAnalysis.response_data, response_fields)
+            ).where(AdCreativeAnalysis.workspace_id == current_workspace.id),
+            AdCreativeAnalysis, cursor, limit, request=http_request
         )
+    )).all(), limit, response)
+    archived = await load_archived_payloads(db, (row.response_archive_hash for row in rows))
     
-    return decoded_analyses
+    return [
+        AdCreativeAnalysisRead(
+            id=row.id,
+            workspace_id=row.workspace_id,
+            user_id=row.user_id,
+            request_data=row.request_data,
+            response_data=response_fields_from_row(row, response_fields, archived.get(row.response_archive_hash)),
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 
 @router.get("/analyses/{analysis_id}", response_model=AdCreativeAnalysisRead)
@@ -142,18 +191,18 @@ async def get_analysis_by_id(
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Get a specific AdCreative analysis by ID.
     """
-    analysis = db.exec(
+    analysis = (await db.exec(
         select(AdCreativeAnalysis)
         .where(
             AdCreativeAnalysis.id == analysis_id,
             AdCreativeAnalysis.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not analysis:
         raise HTTPException(
@@ -161,27 +210,12 @@ async def get_analysis_by_id(
             detail=get_localized_message("analysis_not_found")
         )
     
-    # Decode characters from database
-    import json
-    
-    # Decode request_data
-    if isinstance(analysis.request_data, str):
-        request_data = json.loads(analysis.request_data)
-    else:
-        request_data = analysis.request_data
-        
-    # Decode response_data
-    if isinstance(analysis.response_data, str):
-        response_data = json.loads(analysis.response_data)
-    else:
-        response_data = analysis.response_data
-        
     return AdCreativeAnalysisRead(
         id=analysis.id,
         workspace_id=analysis.workspace_id,
         user_id=analysis.user_id,
-        request_data=request_data,
-        response_data=response_data,
+        request_data=analysis.request_data,
+        response_data=await resolve_response_data(db, analysis),
         created_at=analysis.created_at
     )
 
@@ -192,18 +226,18 @@ async def delete_analysis(
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Delete a specific AdCreative analysis.
     """
-    analysis = db.exec(
+    analysis = (await db.exec(
         select(AdCreativeAnalysis)
         .where(
             AdCreativeAnalysis.id == analysis_id,
             AdCreativeAnalysis.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not analysis:
         raise HTTPException(
@@ -212,10 +246,11 @@ async def delete_analysis(
         )
     
     try:
-        db.delete(analysis)
-        db.commit()
+        await db.delete(analysis)
+        await release_quota(db, WORKSPACE_SCOPE, current_workspace.id, AD_CAMPAIGNS)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete analysis"
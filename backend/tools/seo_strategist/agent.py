@@ -2,12 +2,17 @@
 SEO Strategist AI agent with Gemini integration.
 """
 
+import asyncio
 import json
 import os
 from datetime import datetime
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
+from utils.llm import generate_content
+from utils.tracing import span
+from utils.tool_runs import record_retry
+from utils.llm_budget import LLMBudgetExceeded
 
 from .prompts import MANUAL_SEO_PROMPT_EN, MANUAL_SEO_PROMPT_TR, URL_ANALYSIS_PROMPT_EN, URL_ANALYSIS_PROMPT_TR
 from .schemas import ManualSEORequest, URLSEORequest, SEOAnalysisResult, URLAnalysisResult
@@ -44,11 +49,13 @@ class SEOStrategist:
                 target_keywords=request.target_keywords or "Not specified"
             )
             
-            response = await self.model.generate_content_async(prompt)
+            response = await generate_content(self.model, prompt)
             
             try:
-                response_data = self._parse_ai_response(response.text)
-                if self._validate_manual_response(response_data):
+                with span("parse"):
+                    response_data = self._parse_ai_response(response.text)
+                    valid = self._validate_manual_response(response_data)
+                if valid:
                     return SEOAnalysisResult(
                         title=response_data.get("title", ""),
                         meta_description=response_data.get("meta_description", ""),
@@ -70,8 +77,8 @@ class SEOStrategist:
         Analyze URL and provide comprehensive SEO and AIO analysis.
         """
         try:
-            # Step 1: Extract content from URL
-            content_data = extract_content_from_url(request.url)
+            # Step 1: Extract content from URL (blocking HTTP and parsing, kept off the event loop)
+            content_data = await asyncio.to_thread(extract_content_from_url, request.url)
             
             if 'error' in content_data:
                 return URLAnalysisResult(
@@ -113,6 +120,8 @@ class SEOStrategist:
                 seo_score=analysis_result['analysis'].get('seo_score', 0)
             )
             
+        except LLMBudgetExceeded:
+            raise
         except Exception as e:
             return URLAnalysisResult(
                 url=request.url,
@@ -135,7 +144,9 @@ class SEOStrategist:
         # Try different model names
         model_names = ['gemini-1.5-flash', 'gemini-1.5-flash-latest']
         
-        for model_name in model_names:
+        for attempt, model_name in enumerate(model_names, start=1):
+            if attempt > 1:
+                record_retry()
             try:
                 model = genai.GenerativeModel(model_name)
                 
@@ -143,34 +154,35 @@ class SEOStrategist:
                 prompt_template = URL_ANALYSIS_PROMPT_TR if language == "tr" else URL_ANALYSIS_PROMPT_EN
                 prompt = prompt_template.format(url=content_data.get('url', 'N/A'))
                 
-                response = model.generate_content(prompt)
+                with span("model_attempt", model=model_name, attempt=attempt) as attempt_span:
+                    response = await generate_content(model, prompt)
+                    
+                    with span("parse"):
+                        try:
+                            # First try with clean_json_codeblock
+                            cleaned_text = clean_json_codeblock(response.text)
+                            result = json.loads(cleaned_text)
+                        except json.JSONDecodeError as e:
+                            try:
+                                # Try with _parse_ai_response as fallback
+                                result = self._parse_ai_response(response.text)
+                            except Exception as e2:
+                                result = None
+                    
+                    if attempt_span is not None:
+                        attempt_span.attributes["parsed"] = result is not None
                 
-                try:
-                    # First try with clean_json_codeblock
-                    cleaned_text = clean_json_codeblock(response.text)
-                    result = json.loads(cleaned_text)
-                    return {
-                        'success': True,
-                        'analysis': result
-                    }
-                except json.JSONDecodeError as e:
-                    try:
-                        # Try with _parse_ai_response as fallback
-                        result = self._parse_ai_response(response.text)
-                        return {
-                            'success': True,
-                            'analysis': result
-                        }
-                    except Exception as e2:
-                        continue
+                if result is None:
+                    continue
+                return {
+                    'success': True,
+                    'analysis': result
+                }
                     
+            except LLMBudgetExceeded:
+                # Quota is gone for every model; let the caller answer 429
+                raise
             except Exception as e:
-                # Check if it's a quota exceeded error
-                if "quota" in str(e).lower() or "429" in str(e):
-                    return {
-                        'success': False,
-                        'error': 'API kotası aşıldı. Lütfen daha sonra tekrar deneyin veya API limitlerini kontrol edin.'
-                    }
                 continue
         
         # All AI models failed
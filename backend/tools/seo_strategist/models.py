@@ -1,6 +1,8 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index
 from datetime import datetime
-from typing import Optional, TYPE_CHECKING
+from typing import Optional, Dict, Any, TYPE_CHECKING
+from models.types import JSONPayload
 
 if TYPE_CHECKING:
     from models.workspace import Workspace
@@ -10,11 +12,22 @@ if TYPE_CHECKING:
 class SEOAnalysis(SQLModel, table=True):
     """SEO analysis results model."""
     __tablename__ = "seo_analyses"
+    __table_args__ = (
+        # Keyset pagination of workspace history
+        Index("ix_seo_analyses_workspace_created", "workspace_id", "created_at", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     workspace_id: int = Field(foreign_key="workspace.id")
     user_id: int = Field(foreign_key="user.id")
     analysis_type: str = Field(description="Type of analysis: 'manual' or 'url'")
-    request_data: str = Field(description="JSON string of request data")
-    response_data: str = Field(description="JSON string of analysis results")
+    request_data: Dict[str, Any] = Field(sa_column=Column(JSONPayload, nullable=False), description="Request data")
+    response_data: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONPayload), description="Analysis results")
+    response_archive_hash: Optional[str] = Field(default=None, max_length=64, description="Content hash once response_data is archived")
+    # Per-run measurements recorded by utils.tool_runs
+    stage_timings: Optional[Dict[str, float]] = Field(default=None, sa_column=Column(JSONPayload))
+    retry_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    model_name: Optional[str] = Field(default=None, max_length=100)
+    prompt_tokens: Optional[int] = Field(default=None)
+    completion_tokens: Optional[int] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow) 
\ No newline at end of file
@@ -2,15 +2,24 @@
 Router for SEO Strategist endpoints.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
 from datetime import datetime
-from database import get_session
+from database import get_session, release_connection
 from dependencies import get_current_user, get_current_workspace
 from models.user import User
 from models.workspace import Workspace
 from utils.localization import get_localized_message, get_language_from_request
+from utils.rate_limiting import (
+    limiter, user_key, workspace_key, SEO_RATE_LIMIT_USER, SEO_RATE_LIMIT_WORKSPACE
+)
+from utils.tool_runs import tool_run
+from utils.admission import seo_admission
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset_pagination, finalize_page
+from utils.payloads import parse_response_fields, response_field_columns, response_fields_from_row
+from utils.archive import load_archived_payloads, resolve_payloads, resolve_response_data
 from .schemas import (
     ManualSEORequest, URLSEORequest, SEOAnalysisResult, URLAnalysisResult,
     SEOAnalysisRead
@@ -20,54 +29,64 @@ from .agent import SEOStrategist
 
 router = APIRouter(prefix="/tools/seo-strategist", tags=["seo-strategist"])
 
+# response_data keys of manual and URL analyses
+RESPONSE_FIELDS = set(SEOAnalysisResult.model_fields) | set(URLAnalysisResult.model_fields)
+
 
 @router.post("/manual", response_model=SEOAnalysisResult)
+@limiter.limit(SEO_RATE_LIMIT_USER, key_func=user_key)
+@limiter.limit(SEO_RATE_LIMIT_WORKSPACE, key_func=workspace_key)
 async def analyze_manual_seo(
-    request: ManualSEORequest,
+    request: Request,
+    payload: ManualSEORequest,
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session),
-    http_request: Request = None
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Analyze manual SEO input and provide optimization suggestions.
     """
     try:
-        # Initialize SEOStrategist
-        agent = SEOStrategist()
-        
-        # Get user's language preference
-        language = get_language_from_request(http_request) if http_request else "en"
-        
-        # Generate analysis
-        response = await agent.analyze_manual_seo(request)
+        workspace_id = current_workspace.id
+        user_id = current_user.id
         
-        # Save to database
-        import json
+        # Don't hold a pooled connection while waiting on the model
+        await release_connection(db)
         
-        # Store as JSON strings with Turkish character preservation
-        request_data = json.dumps(request.dict(), ensure_ascii=False)
-        response_data = json.dumps(response.dict(), ensure_ascii=False)
+        # Wait for one of the workspace's analysis slots
+        async with seo_admission.admit(workspace_id, request):
+            with tool_run() as run:
+                # Initialize SEOStrategist
+                agent = SEOStrategist()
+                
+                # Get user's language preference
+                language = get_language_from_request(request)
+                
+                # Generate analysis
+                response = await agent.analyze_manual_seo(payload)
         
+        # Save to database as native JSON
         analysis = SEOAnalysis(
-            workspace_id=current_workspace.id,
-            user_id=current_user.id,
+            workspace_id=workspace_id,
+            user_id=user_id,
             analysis_type="manual",
-            request_data=request_data,
-            response_data=response_data
+            request_data=payload.model_dump(mode="json"),
+            response_data=response.model_dump(mode="json"),
+            **run.fields()
         )
         
         try:
             db.add(analysis)
-            db.commit()
-            db.refresh(analysis)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise
         
         return response
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -76,57 +95,64 @@ async def analyze_manual_seo(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=get_localized_message("seo_analysis_error", http_request)
+            detail=get_localized_message("seo_analysis_error", request)
         )
 
 
 @router.post("/url", response_model=URLAnalysisResult)
+@limiter.limit(SEO_RATE_LIMIT_USER, key_func=user_key)
+@limiter.limit(SEO_RATE_LIMIT_WORKSPACE, key_func=workspace_key)
 async def analyze_url_seo(
-    request: URLSEORequest,
+    request: Request,
+    payload: URLSEORequest,
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session),
-    http_request: Request = None
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Analyze URL and provide comprehensive SEO and AIO analysis.
     """
     try:
-        # Initialize SEOStrategist
-        agent = SEOStrategist()
-        
-        # Get user's language preference
-        language = get_language_from_request(http_request) if http_request else "en"
+        workspace_id = current_workspace.id
+        user_id = current_user.id
         
-        # Generate analysis
-        response = await agent.analyze_url_seo(request)
+        # Don't hold a pooled connection while waiting on the model
+        await release_connection(db)
         
-        # Save to database
-        import json
-        
-        # Store as JSON strings with Turkish character preservation
-        request_data = json.dumps(request.dict(), ensure_ascii=False)
-        response_data = json.dumps(response.dict(), ensure_ascii=False)
+        # Wait for one of the workspace's analysis slots
+        async with seo_admission.admit(workspace_id, request):
+            with tool_run() as run:
+                # Initialize SEOStrategist
+                agent = SEOStrategist()
+                
+                # Get user's language preference
+                language = get_language_from_request(request)
+                
+                # Generate analysis
+                response = await agent.analyze_url_seo(payload)
         
+        # Save to database as native JSON
         analysis = SEOAnalysis(
-            workspace_id=current_workspace.id,
-            user_id=current_user.id,
+            workspace_id=workspace_id,
+            user_id=user_id,
             analysis_type="url",
-            request_data=request_data,
-            response_data=response_data
+            request_data=payload.model_dump(mode="json"),
+            response_data=response.model_dump(mode="json"),
+            **run.fields()
         )
         
         try:
             db.add(analysis)
-            db.commit()
-            db.refresh(analysis)
+            await db.commit()
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             raise
         
         return response
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -135,55 +161,82 @@ async def analyze_url_seo(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=get_localized_message("seo_analysis_error", http_request)
+            detail=get_localized_message("seo_analysis_error", request)
         )
 
 
 @router.get("/analyses", response_model=List[SEOAnalysisRead])
 async def get_workspace_analyses(
     workspace_slug: str,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma separated response_data fields to return, e.g. 'seo_score,score'"),
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session),
+    http_request: Request = None
 ):
     """
-    Get all SEO analyses for the current workspace.
+    List SEO analyses for the current workspace.
+    
+    Results are paginated newest first; follow the X-Next-Cursor header for
+    the next page. With `fields`, only those keys of response_data are
+    extracted by the database.
     """
-    analyses = db.exec(
-        select(SEOAnalysis)
-        .where(SEOAnalysis.workspace_id == current_workspace.id)
-        .order_by(SEOAnalysis.created_at.desc())
-    ).all()
+    response_fields = parse_response_fields(fields, RESPONSE_FIELDS, http_request)
     
-    # Decode Turkish characters from database
-    import json
-    decoded_analyses = []
-    for a in analyses:
-        # Decode request_data
-        if isinstance(a.request_data, str):
-            request_data = json.loads(a.request_data)
-        else:
-            request_data = a.request_data
-            
-        # Decode response_data
-        if isinstance(a.response_data, str):
-            response_data = json.loads(a.response_data)
-        else:
-            response_data = a.response_data
-            
-        decoded_analyses.append(
+    if response_fields is None:
+        analyses = finalize_page((await db.exec(
+            apply_keyset_pagination(
+                select(SEOAnalysis).where(SEOAnalysis.workspace_id == current_workspace.id),
+                SEOAnalysis, cursor, limit, request=http_request
+            )
+        )).all(), limit, response)
+        payloads = await resolve_payloads(db, analyses)
+        
+        return [
             SEOAnalysisRead(
                 id=a.id,
                 workspace_id=a.workspace_id,
                 user_id=a.user_id,
                 analysis_type=a.analysis_type,
-                request_data=request_data,
-                response_data=response_data,
+                request_data=a.request_data,
+                response_data=payload,
                 created_at=a.created_at
             )
+            for a, payload in zip(analyses, payloads)
+        ]
+    
+    rows = finalize_page((await db.exec(
+        apply_keyset_pagination(
+            select(
+                SEOAnalysis.id,
+                SEOAnalysis.workspace_id,
+                SEOAnalysis.user_id,
+                SEOAnalysis.analysis_type,
+                SEOAnalysis.request_data,
+                SEOAnalysis.created_at,
+                SEOAnalysis.response_archive_hash,
+                *response_field_columns(SEOAnalysis.response_data, response_fields)
+            ).where(SEOAnalysis.workspace_id == current_workspace.id),
+            SEOAnalysis, cursor, limit, request=http_request
         )
+    )).all(), limit, response)
+    archived = await load_archived_payloads(db, (row.response_archive_hash for row in rows))
     
-    return decoded_analyses
+    return [
+        SEOAnalysisRead(
+            id=row.id,
+            workspace_id=row.workspace_id,
+            user_id=row.user_id,
+            analysis_type=row.analysis_type,
+            request_data=row.request_data,
+            response_data=response_fields_from_row(row, response_fields, archived.get(row.response_archive_hash)),
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 
 @router.get("/analyses/{analysis_id}", response_model=SEOAnalysisRead)
@@ -192,18 +245,18 @@ async def get_analysis_by_id(
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Get a specific SEO analysis by ID.
     """
-    analysis = db.exec(
+    analysis = (await db.exec(
         select(SEOAnalysis)
         .where(
             SEOAnalysis.id == analysis_id,
             SEOAnalysis.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not analysis:
         raise HTTPException(
@@ -211,28 +264,13 @@ async def get_analysis_by_id(
             detail=get_localized_message("analysis_not_found")
         )
     
-    # Decode Turkish characters from database
-    import json
-    
-    # Decode request_data
-    if isinstance(analysis.request_data, str):
-        request_data = json.loads(analysis.request_data)
-    else:
-        request_data = analysis.request_data
-        
-    # Decode response_data
-    if isinstance(analysis.response_data, str):
-        response_data = json.loads(analysis.response_data)
-    else:
-        response_data = analysis.response_data
-        
     return SEOAnalysisRead(
         id=analysis.id,
         workspace_id=analysis.workspace_id,
         user_id=analysis.user_id,
         analysis_type=analysis.analysis_type,
-        request_data=request_data,
-        response_data=response_data,
+        request_data=analysis.request_data,
+        response_data=await resolve_response_data(db, analysis),
         created_at=analysis.created_at
     )
 
@@ -243,18 +281,18 @@ async def delete_analysis(
     workspace_slug: str,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Delete a specific SEO analysis.
     """
-    analysis = db.exec(
+    analysis = (await db.exec(
         select(SEOAnalysis)
         .where(
             SEOAnalysis.id == analysis_id,
             SEOAnalysis.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not analysis:
         raise HTTPException(
@@ -263,10 +301,10 @@ async def delete_analysis(
         )
     
     try:
-        db.delete(analysis)
-        db.commit()
+        await db.delete(analysis)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete analysis"
@@ -8,6 +8,8 @@ from datetime import datetime
 from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 import google.generativeai as genai
+from utils.llm import generate_content
+from utils.tracing import span
 
 from .prompts import TREND_ANALYSIS_PROMPT_EN, TREND_ANALYSIS_PROMPT_TR
 from .utils import format_currency_range
@@ -49,10 +51,12 @@ class TrendAgent:
                 product_count=request.product_count or 2,
                 trends_data=""
             )
-            response = await self.model.generate_content_async(prompt)
+            response = await generate_content(self.model, prompt)
             try:
-                response_data = self._parse_ai_response(response.text)
-                if self._validate_response(response_data):
+                with span("parse"):
+                    response_data = self._parse_ai_response(response.text)
+                    valid = self._validate_response(response_data)
+                if valid:
                     products = []
                     for product_data in response_data.get("products", []):
                         product = ProductSuggestion(
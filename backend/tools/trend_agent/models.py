@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, TYPE_CHECKING
-from sqlmodel import SQLModel, Field, Text, Column, Relationship
+from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlalchemy import Index
+from models.types import JSONPayload
 
 if TYPE_CHECKING:
     from models.workspace import Workspace
@@ -9,12 +11,24 @@ if TYPE_CHECKING:
 
 class TrendSuggestion(SQLModel, table=True, extend_existing=True):
     __tablename__ = "trend_suggestions"
+    __table_args__ = (
+        # Keyset pagination of workspace history
+        Index("ix_trend_suggestions_workspace_created", "workspace_id", "created_at", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     workspace_id: int = Field(foreign_key="workspace.id", index=True)
     user_id: int = Field(foreign_key="user.id", index=True)
-    request_data: str = Field(sa_column=Column(Text))
-    response_data: str = Field(sa_column=Column(Text))
+    request_data: Dict[str, Any] = Field(sa_column=Column(JSONPayload))
+    response_data: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONPayload))
+    # Set once response_data has been moved to archived_payloads
+    response_archive_hash: Optional[str] = Field(default=None, max_length=64)
+    # Per-run measurements recorded by utils.tool_runs
+    stage_timings: Optional[Dict[str, float]] = Field(default=None, sa_column=Column(JSONPayload))
+    retry_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
+    model_name: Optional[str] = Field(default=None, max_length=100)
+    prompt_tokens: Optional[int] = Field(default=None)
+    completion_tokens: Optional[int] = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
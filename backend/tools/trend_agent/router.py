@@ -2,16 +2,29 @@
 Enhanced router for TrendAgent endpoints with Google Trends integration and AI agent chat.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlmodel import Session, select
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 import json
-from database import get_session
+from database import get_session, release_connection
 from dependencies import get_current_user, get_current_workspace
 from models.user import User
 from models.workspace import Workspace
 from utils.localization import get_localized_message, get_language_from_request
+from utils.quotas import (
+    WORKSPACE_SCOPE, TREND_SUGGESTIONS, TREND_SUGGESTION_LIMIT, reserve_quota, release_quota,
+    release_failed_reservation
+)
+from utils.rate_limiting import (
+    limiter, user_key, workspace_key, TREND_RATE_LIMIT_USER, TREND_RATE_LIMIT_WORKSPACE
+)
+from utils.tool_runs import tool_run
+from utils.admission import trend_admission
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, apply_keyset_pagination, finalize_page
+from utils.payloads import parse_response_fields, response_field_columns, response_fields_from_row
+from utils.archive import load_archived_payloads, resolve_payloads, resolve_response_data
 from .schemas import (
     TrendRequest, TrendResponse, TrendSuggestionRead
 )
@@ -22,12 +35,14 @@ router = APIRouter(prefix="/tools/trend-agent", tags=["trend-agent"])
 
 
 @router.post("/suggest", response_model=TrendResponse)
+@limiter.limit(TREND_RATE_LIMIT_USER, key_func=user_key)
+@limiter.limit(TREND_RATE_LIMIT_WORKSPACE, key_func=workspace_key)
 async def generate_trend_suggestion(
-    request: TrendRequest,
+    request: Request,
+    payload: TrendRequest,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session),
-    http_request: Request = None
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Generate comprehensive product trend suggestions using AI and Google Trends.
@@ -35,56 +50,60 @@ async def generate_trend_suggestion(
     Each workspace is limited to 3 suggestions.
     """
     try:
-        # Check if workspace has reached the limit (3 suggestions)
-        existing_suggestions = db.exec(
-            select(TrendSuggestion).where(TrendSuggestion.workspace_id == current_workspace.id)
-        ).all()
+        # Reserve one of the workspace's 3 suggestions before generating
+        reserved = await reserve_quota(
+            db, WORKSPACE_SCOPE, current_workspace.id, TREND_SUGGESTIONS, TREND_SUGGESTION_LIMIT,
+            count_existing=select(func.count()).select_from(TrendSuggestion).where(
+                TrendSuggestion.workspace_id == current_workspace.id
+            )
+        )
         
-        if len(existing_suggestions) >= 3:
+        if not reserved:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=get_localized_message("trend_suggestion_limit_reached", http_request)
+                detail=get_localized_message("trend_suggestion_limit_reached", request)
             )
+        await db.commit()
         
-        # Initialize TrendAgent
-        agent = TrendAgent()
-        
-        # Get user's language preference
-        language = get_language_from_request(http_request) if http_request else "en"
-        
-        # Generate suggestion
-        response = await agent.generate_suggestion(request)
+        workspace_id = current_workspace.id
+        user_id = current_user.id
         
-        # Save to database
-        # Convert response to dict and handle datetime serialization
-        response_dict = response.dict()
-        if 'created_at' in response_dict and isinstance(response_dict['created_at'], datetime):
-            response_dict['created_at'] = response_dict['created_at'].isoformat()
-        
-        # Direct JSON string storage with Turkish character preservation
-        import json
-        
-        # Store as JSON strings with Turkish characters preserved
-        request_data = json.dumps(request.dict(), ensure_ascii=False)
-        response_data = json.dumps(response_dict, ensure_ascii=False)
-        
-        suggestion = TrendSuggestion(
-            workspace_id=current_workspace.id,
-            user_id=current_user.id,
-            request_data=request_data,
-            response_data=response_data
-        )
+        # Don't hold a pooled connection while waiting on the model
+        await release_connection(db)
         
         try:
+            # Wait for one of the workspace's generation slots
+            async with trend_admission.admit(workspace_id, request):
+                with tool_run() as run:
+                    # Initialize TrendAgent
+                    agent = TrendAgent()
+                    
+                    # Get user's language preference
+                    language = get_language_from_request(request)
+                    
+                    # Generate suggestion
+                    response = await agent.generate_suggestion(payload)
+            
+            # Save to database as native JSON
+            suggestion = TrendSuggestion(
+                workspace_id=workspace_id,
+                user_id=user_id,
+                request_data=payload.model_dump(mode="json"),
+                response_data=response.model_dump(mode="json"),
+                **run.fields()
+            )
+            
             db.add(suggestion)
-            db.commit()
-            db.refresh(suggestion)
-        except Exception as e:
-            db.rollback()
+            await db.commit()
+        except BaseException:
+            # Give the reserved suggestion back, also when the request is cancelled
+            await release_failed_reservation(db, WORKSPACE_SCOPE, workspace_id, TREND_SUGGESTIONS)
             raise
         
         return response
         
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -93,7 +112,7 @@ async def generate_trend_suggestion(
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=get_localized_message("trend_analysis_error", http_request)
+            detail=get_localized_message("trend_analysis_error", request)
         )
 
 
@@ -102,47 +121,72 @@ async def generate_trend_suggestion(
 
 @router.get("/suggestions", response_model=List[TrendSuggestionRead])
 async def get_workspace_suggestions(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = Query(None, description="Comma separated response_data fields to return, e.g. 'summary,next_steps'"),
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session),
+    http_request: Request = None
 ):
     """
-    Get all trend suggestions for the current workspace.
+    List trend suggestions for the current workspace.
+    
+    Results are paginated newest first; follow the X-Next-Cursor header for
+    the next page. With `fields`, only those keys of response_data are
+    extracted by the database.
     """
-    suggestions = db.exec(
-        select(TrendSuggestion)
-        .where(TrendSuggestion.workspace_id == current_workspace.id)
-        .order_by(TrendSuggestion.created_at.desc())
-    ).all()
+    response_fields = parse_response_fields(fields, TrendResponse.model_fields, http_request)
     
-    # Decode Turkish characters from database
-    import json
-    decoded_suggestions = []
-    for s in suggestions:
-        # Decode request_data
-        if isinstance(s.request_data, str):
-            request_data = json.loads(s.request_data)
-        else:
-            request_data = s.request_data
-            
-        # Decode response_data
-        if isinstance(s.response_data, str):
-            response_data = json.loads(s.response_data)
-        else:
-            response_data = s.response_data
-            
-        decoded_suggestions.append(
+    if response_fields is None:
+        suggestions = finalize_page((await db.exec(
+            apply_keyset_pagination(
+                select(TrendSuggestion).where(TrendSuggestion.workspace_id == current_workspace.id),
+                TrendSuggestion, cursor, limit, request=http_request
+            )
+        )).all(), limit, response)
+        payloads = await resolve_payloads(db, suggestions)
+        
+        return [
             TrendSuggestionRead(
                 id=s.id,
                 workspace_id=s.workspace_id,
                 user_id=s.user_id,
-                request_data=request_data,
-                response_data=response_data,
+                request_data=s.request_data,
+                response_data=payload,
                 created_at=s.created_at
             )
+            for s, payload in zip(suggestions, payloads)
+        ]
+    
+    rows = finalize_page((await db.exec(
+        apply_keyset_pagination(
+            select(
+                TrendSuggestion.id,
+                TrendSuggestion.workspace_id,
+                TrendSuggestion.user_id,
+                TrendSuggestion.request_data,
+                TrendSuggestion.created_at,
+                TrendSuggestion.response_archive_hash,
+                *response_field_columns(TrendSuggestion.response_data, response_fields)
+            ).where(TrendSuggestion.workspace_id == current_workspace.id),
+            TrendSuggestion, cursor, limit, request=http_request
         )
+    )).all(), limit, response)
+    archived = await load_archived_payloads(db, (row.response_archive_hash for row in rows))
     
-    return decoded_suggestions
+    return [
+        TrendSuggestionRead(
+            id=row.id,
+            workspace_id=row.workspace_id,
+            user_id=row.user_id,
+            request_data=row.request_data,
+            response_data=response_fields_from_row(row, response_fields, archived.get(row.response_archive_hash)),
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
 
 
 @router.get("/suggestions/{suggestion_id}", response_model=TrendSuggestionRead)
@@ -150,18 +194,18 @@ async def get_suggestion_by_id(
     suggestion_id: int,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Get a specific trend suggestion by ID.
     """
-    suggestion = db.exec(
+    suggestion = (await db.exec(
         select(TrendSuggestion)
         .where(
             TrendSuggestion.id == suggestion_id,
             TrendSuggestion.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not suggestion:
         raise HTTPException(
@@ -169,27 +213,12 @@ async def get_suggestion_by_id(
             detail=get_localized_message("suggestion_not_found")
         )
     
-    # Decode Turkish characters from database
-    import json
-    
-    # Decode request_data
-    if isinstance(suggestion.request_data, str):
-        request_data = json.loads(suggestion.request_data)
-    else:
-        request_data = suggestion.request_data
-        
-    # Decode response_data
-    if isinstance(suggestion.response_data, str):
-        response_data = json.loads(suggestion.response_data)
-    else:
-        response_data = suggestion.response_data
-    
     return TrendSuggestionRead(
         id=suggestion.id,
         workspace_id=suggestion.workspace_id,
         user_id=suggestion.user_id,
-        request_data=request_data,
-        response_data=response_data,
+        request_data=suggestion.request_data,
+        response_data=await resolve_response_data(db, suggestion),
         created_at=suggestion.created_at
     )
 
@@ -199,18 +228,18 @@ async def delete_suggestion(
     suggestion_id: int,
     current_user: User = Depends(get_current_user),
     current_workspace: Workspace = Depends(get_current_workspace),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_session)
 ):
     """
     Delete a trend suggestion.
     """
-    suggestion = db.exec(
+    suggestion = (await db.exec(
         select(TrendSuggestion)
         .where(
             TrendSuggestion.id == suggestion_id,
             TrendSuggestion.workspace_id == current_workspace.id
         )
-    ).first()
+    )).first()
     
     if not suggestion:
         raise HTTPException(
@@ -218,19 +247,20 @@ async def delete_suggestion(
             detail=get_localized_message("suggestion_not_found")
         )
     
-    db.delete(suggestion)
-    db.commit()
+    await db.delete(suggestion)
+    await release_quota(db, WORKSPACE_SCOPE, current_workspace.id, TREND_SUGGESTIONS)
+    await db.commit()
     
     return {"message": get_localized_message("suggestion_deleted")}
 
 
 @router.get("/categories")
 async def get_trend_categories(
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get top 10 trend categories with their trend data."""
     try:
-        categories = session.exec(select(TrendCategory)).all()
+        categories = (await session.exec(select(TrendCategory))).all()
         
         result = []
         for category in categories:
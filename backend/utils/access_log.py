@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+import random
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import Request
+from utils.query_stats import QueryStats
+from utils.request_context import RequestContext
+
+access_logger = logging.getLogger("access")
+
+# Share of fast, successful requests written to the access log (0.0 - 1.0)
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "0.1"))
+# Requests slower than this are always logged
+ACCESS_LOG_SLOW_MS = float(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+
+
+def route_template(request: Request) -> str:
+    """Matched route path (e.g. /workspaces/{workspace_slug}), or the raw path if none matched"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or request.url.path
+
+
+def should_log(status_code: int, duration_ms: float) -> bool:
+    """Errors and slow requests are always kept; the rest are sampled"""
+    if status_code >= 400 or duration_ms >= ACCESS_LOG_SLOW_MS:
+        return True
+    return random.random() < ACCESS_LOG_SAMPLE_RATE
+
+
+def log_access(
+    request: Request,
+    status_code: int,
+    duration: float,
+    query_stats: QueryStats,
+    context: RequestContext,
+    route: Optional[str] = None
+):
+    """Write one JSON access record if the request is kept by sampling"""
+    duration_ms = duration * 1000
+    if not should_log(status_code, duration_ms) or not access_logger.isEnabledFor(logging.INFO):
+        return
+
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "request_id": context.request_id,
+        "method": request.method,
+        "route": route or route_template(request),
+        "path": request.url.path,
+        "status": status_code,
+        "duration_ms": round(duration_ms, 1),
+        "db_queries": query_stats.count,
+        "db_time_ms": round(query_stats.total_time * 1000, 1),
+        "upstream_calls": context.upstream_calls,
+        "upstream_time_ms": round(context.upstream_time * 1000, 1),
+    }
+    access_logger.info(json.dumps(record, separators=(",", ":")))
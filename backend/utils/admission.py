@@ -0,0 +1,130 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict
+from fastapi import HTTPException, status, Request
+from utils.localization import get_localized_message
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Per-workspace limits for LLM-backed endpoints
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "2"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "4"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "30"))
+
+# Weight of the newest run in the service time average
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class _WorkspaceSlots:
+    __slots__ = ("semaphore", "active", "waiting")
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.waiting = 0
+
+
+class AdmissionController:
+    """Per-workspace concurrency cap with a short bounded wait queue.
+
+    Requests beyond the queue (or waiting longer than queue_timeout) get 429
+    with a Retry-After estimated from the average service time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        expected_service_time: float = 10.0
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.service_time = expected_service_time
+        self.rejections = 0
+        self._workspaces: Dict[int, _WorkspaceSlots] = {}
+
+    def retry_after(self, slots: _WorkspaceSlots) -> int:
+        """Seconds until a new request would likely get a slot"""
+        backlog = slots.active + slots.waiting - self.max_concurrency + 1
+        return max(1, math.ceil(self.service_time * backlog / self.max_concurrency))
+
+    def _reject(self, workspace_id: int, slots: _WorkspaceSlots, request: Request = None):
+        self.rejections += 1
+        retry_after = self.retry_after(slots)
+        logger.warning(
+            "%s admission rejected for workspace_id: %s (active: %s, waiting: %s, retry after: %ss)",
+            self.name, workspace_id, slots.active, slots.waiting, retry_after
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=get_localized_message("WORKSPACE_BUSY", request),
+            headers={"Retry-After": str(retry_after)}
+        )
+
+    @asynccontextmanager
+    async def admit(self, workspace_id: int, request: Request = None):
+        """Hold one of the workspace's slots for the duration of the block"""
+        slots = self._workspaces.get(workspace_id)
+        if slots is None:
+            slots = self._workspaces[workspace_id] = _WorkspaceSlots(self.max_concurrency)
+
+        if slots.active >= self.max_concurrency and slots.waiting >= self.max_queue:
+            self._reject(workspace_id, slots, request)
+
+        slots.waiting += 1
+        acquired = False
+        try:
+            await asyncio.wait_for(slots.semaphore.acquire(), timeout=self.queue_timeout)
+            acquired = True
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            slots.waiting -= 1
+            # Timed out or cancelled while queued: don't leave an idle entry behind
+            if not acquired:
+                self._discard_if_idle(workspace_id, slots)
+
+        if not acquired:
+            self._reject(workspace_id, slots, request)
+
+        slots.active += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.service_time += SERVICE_TIME_SMOOTHING * (elapsed - self.service_time)
+            slots.active -= 1
+            slots.semaphore.release()
+            self._discard_if_idle(workspace_id, slots)
+
+    def _discard_if_idle(self, workspace_id: int, slots: _WorkspaceSlots):
+        if slots.active == 0 and slots.waiting == 0 and self._workspaces.get(workspace_id) is slots:
+            del self._workspaces[workspace_id]
+
+    def snapshot(self) -> Dict:
+        """Current load per busy workspace and rejection count"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "service_time_seconds": round(self.service_time, 3),
+            "rejections": self.rejections,
+            "workspaces": {
+                str(workspace_id): {"active": slots.active, "waiting": slots.waiting}
+                for workspace_id, slots in self._workspaces.items()
+            }
+        }
+
+
+# One controller per tool, since their service times differ widely
+trend_admission = AdmissionController("trend-agent", expected_service_time=15.0)
+seo_admission = AdmissionController("seo-strategist", expected_service_time=10.0)
+adcreative_admission = AdmissionController("adcreative", expected_service_time=30.0)
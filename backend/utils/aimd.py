@@ -0,0 +1,109 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+from utils.logging_config import get_logger
+from utils.metrics import (
+    Histogram,
+    upstream_concurrency_in_flight,
+    upstream_concurrency_limit,
+    upstream_limit_decreases,
+    upstream_limiter_latency
+)
+
+logger = get_logger(__name__)
+
+
+class AIMDLimiter:
+    """Concurrency limit that adapts to upstream health.
+
+    Each fast success adds 1/limit (about +1 per round of calls), but only
+    if the call started while at least `increase_utilization` of the limit
+    was in use, so quiet periods don't raise a limit that was never tested.
+    A timeout, an overload error or a latency spike multiplies the limit by
+    `decrease_factor`. Calls that started before the last cut don't cut again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        latency_target: float,
+        spike_factor: float = 2.0,
+        decrease_factor: float = 0.5,
+        increase_utilization: float = 0.5,
+        is_overload: Optional[Callable[[BaseException], bool]] = None
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.spike_factor = spike_factor
+        self.decrease_factor = decrease_factor
+        self.increase_utilization = increase_utilization
+        self.is_overload = is_overload or (lambda error: isinstance(error, asyncio.TimeoutError))
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.decreases = 0
+        self.latency = Histogram(buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 60.0, 120.0))
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+        upstream_concurrency_limit.labels(name).set(int(self.limit))
+        upstream_concurrency_in_flight.labels(name).set(0)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one unit of upstream concurrency for the duration of the block"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            saturated = self.in_flight >= int(self.limit) * self.increase_utilization
+            upstream_concurrency_in_flight.labels(self.name).inc()
+
+        started_at = time.monotonic()
+        overloaded = False
+        try:
+            yield
+        except BaseException as e:
+            overloaded = self.is_overload(e)
+            raise
+        finally:
+            elapsed = time.monotonic() - started_at
+            self.latency.observe(elapsed)
+            upstream_limiter_latency.labels(self.name).observe(elapsed)
+            async with self._condition:
+                self.in_flight -= 1
+                upstream_concurrency_in_flight.labels(self.name).dec()
+                self._adjust(started_at, elapsed, overloaded, saturated)
+                upstream_concurrency_limit.labels(self.name).set(int(self.limit))
+                self._condition.notify_all()
+
+    def _adjust(self, started_at: float, elapsed: float, overloaded: bool, saturated: bool):
+        if overloaded or elapsed > self.latency_target * self.spike_factor:
+            if started_at >= self._last_decrease:
+                previous = self.limit
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+                upstream_limit_decreases.labels(self.name).inc()
+                logger.warning(
+                    "%s concurrency limit cut %.1f -> %.1f (%s)",
+                    self.name, previous, self.limit,
+                    "overload" if overloaded else "latency %.1fs" % elapsed
+                )
+        elif saturated and elapsed <= self.latency_target:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def snapshot(self) -> Dict:
+        """Current limit, in-flight calls and observed latency"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "latency_target": self.latency_target,
+            "decreases": self.decreases,
+            "latency_seconds": self.latency.snapshot()
+        }
@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, exists, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.archive import ArchivedPayload
+from tools.trend_agent.models import TrendSuggestion
+from tools.seo_strategist.models import SEOAnalysis
+from tools.adcreative.models import AdCreativeAnalysis
+from utils.logging_config import get_logger
+
+try:
+    import zstandard
+except ImportError:  # gzip from the standard library is the fallback codec
+    zstandard = None
+
+logger = get_logger(__name__)
+
+# Tool tables whose response payloads can be moved to cold storage
+ARCHIVABLE_MODELS = (TrendSuggestion, SEOAnalysis, AdCreativeAnalysis)
+
+# Archival configuration
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "200"))
+ARCHIVE_CODEC = os.getenv("ARCHIVE_CODEC", "zstd" if zstandard else "gzip")
+if ARCHIVE_CODEC == "zstd" and zstandard is None:
+    ARCHIVE_CODEC = "gzip"
+
+
+def compress_payload(payload: Dict[str, Any]) -> Tuple[str, bytes, int]:
+    """Canonical JSON encoding of a payload: (sha256 hash, compressed bytes, raw size)"""
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode()
+    content_hash = hashlib.sha256(raw).hexdigest()
+
+    if ARCHIVE_CODEC == "zstd":
+        data = zstandard.ZstdCompressor(level=10).compress(raw)
+    else:
+        data = gzip.compress(raw, compresslevel=9)
+    return content_hash, data, len(raw)
+
+
+def decompress_payload(codec: str, data: bytes) -> Dict[str, Any]:
+    """Decode a payload stored by compress_payload"""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-archived payloads")
+        raw = zstandard.ZstdDecompressor().decompress(data)
+    else:
+        raw = gzip.decompress(data)
+    return json.loads(raw)
+
+
+async def load_archived_payloads(session: AsyncSession, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch and decompress archived payloads by content hash in one query"""
+    hashes = {h for h in hashes if h}
+    if not hashes:
+        return {}
+
+    statement = select(ArchivedPayload).where(ArchivedPayload.content_hash.in_(hashes))
+    archived = (await session.exec(statement)).all()
+    return {a.content_hash: decompress_payload(a.codec, a.data) for a in archived}
+
+
+async def resolve_payloads(session: AsyncSession, rows: List) -> List[Optional[Dict[str, Any]]]:
+    """response_data for each row, reading archived ones from cold storage"""
+    archived = await load_archived_payloads(session, (row.response_archive_hash for row in rows))
+    return [
+        archived.get(row.response_archive_hash, {}) if row.response_archive_hash else row.response_data
+        for row in rows
+    ]
+
+
+async def resolve_response_data(session: AsyncSession, row) -> Optional[Dict[str, Any]]:
+    """response_data of a single row, decompressed if it has been archived"""
+    return (await resolve_payloads(session, [row]))[0]
+
+
+def _insert_ignore(session: AsyncSession, values: dict):
+    """INSERT that skips hashes already stored (PostgreSQL and SQLite)"""
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(ArchivedPayload).values(**values).on_conflict_do_nothing(index_elements=["content_hash"])
+
+
+async def _store_payload(session: AsyncSession, content_hash: str, data: bytes, size: int):
+    values = {
+        "content_hash": content_hash,
+        "codec": ARCHIVE_CODEC,
+        "data": data,
+        "original_size": size,
+        "created_at": datetime.utcnow(),
+    }
+    statement = _insert_ignore(session, values)
+    if statement is not None:
+        await session.exec(statement)
+    elif await session.get(ArchivedPayload, content_hash) is None:
+        session.add(ArchivedPayload(**values))
+        await session.flush()
+
+
+async def archive_model_payloads(
+    session: AsyncSession,
+    model,
+    older_than: datetime,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> int:
+    """Move response payloads of one tool table created before `older_than` to cold storage"""
+    archived = 0
+    while True:
+        statement = (
+            select(model.id, model.response_data)
+            .where(
+                model.created_at < older_than,
+                model.response_archive_hash.is_(None),
+                model.response_data.is_not(None)
+            )
+            .order_by(model.id)
+            .limit(batch_size)
+        )
+        rows = (await session.exec(statement)).all()
+        if not rows:
+            break
+
+        stored = set()
+        for row in rows:
+            content_hash, data, size = compress_payload(row.response_data)
+            if content_hash not in stored:
+                await _store_payload(session, content_hash, data, size)
+                stored.add(content_hash)
+
+            await session.exec(
+                update(model)
+                .where(model.id == row.id)
+                .values(response_data=None, response_archive_hash=content_hash)
+            )
+
+        # Commit per batch so a long run holds no large transaction
+        await session.commit()
+        archived += len(rows)
+
+    return archived
+
+
+async def prune_orphaned_payloads(session: AsyncSession) -> int:
+    """Delete archived payloads no longer referenced by any tool row"""
+    statement = delete(ArchivedPayload)
+    for model in ARCHIVABLE_MODELS:
+        statement = statement.where(
+            ~exists().where(model.response_archive_hash == ArchivedPayload.content_hash)
+        )
+    result = await session.exec(statement)
+    await session.commit()
+    return result.rowcount
+
+
+async def archive_old_payloads(
+    session: AsyncSession,
+    older_than_days: int = ARCHIVE_AFTER_DAYS,
+    batch_size: int = ARCHIVE_BATCH_SIZE
+) -> Dict[str, int]:
+    """Archive payloads of every tool table older than the given age"""
+    older_than = datetime.utcnow() - timedelta(days=older_than_days)
+    results = {}
+    for model in ARCHIVABLE_MODELS:
+        results[model.__tablename__] = await archive_model_payloads(session, model, older_than, batch_size)
+        logger.info("Archived %s payloads from %s", results[model.__tablename__], model.__tablename__)
+    return results
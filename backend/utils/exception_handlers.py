@@ -10,7 +10,7 @@ logger = get_logger(__name__)
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors (422)."""
-    logger.warning(f"Validation error: {exc.errors()}")
+    logger.warning("Validation error: %s", exc.errors())
     
     return JSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
@@ -23,7 +23,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 async def integrity_error_handler(request: Request, exc: IntegrityError):
     """Handle database integrity errors."""
-    logger.error(f"Database integrity error: {str(exc)}")
+    logger.error("Database integrity error: %s", exc)
     
     return JSONResponse(
         status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,7 +36,7 @@ async def integrity_error_handler(request: Request, exc: IntegrityError):
 
 async def not_found_exception_handler(request: Request, exc: Exception):
     """Handle 404 errors."""
-    logger.warning(f"Not found: {request.url}")
+    logger.warning("Not found: %s", request.url)
     
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
@@ -49,7 +49,7 @@ async def not_found_exception_handler(request: Request, exc: Exception):
 
 async def internal_server_error_handler(request: Request, exc: Exception):
     """Handle 500 errors."""
-    logger.error(f"Internal server error: {str(exc)}", exc_info=True)
+    logger.error("Internal server error: %s", exc, exc_info=True)
     
     return JSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -61,7 +61,7 @@ async def internal_server_error_handler(request: Request, exc: Exception):
 
 async def rate_limit_exceeded_handler(request: Request, exc: Exception):
     """Handle rate limiting errors."""
-    logger.warning(f"Rate limit exceeded for {request.client.host}")
+    logger.warning("Rate limit exceeded for %s", request.client.host)
     
     return JSONResponse(
         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -89,5 +89,5 @@ def setup_exception_handlers(app):
             response = await call_next(request)
             return response
         except Exception as exc:
-            logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
+            logger.error("Unhandled exception: %s", exc, exc_info=True)
             return await internal_server_error_handler(request, exc) 
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+from utils.aimd import AIMDLimiter
+from utils.llm_budget import LLMBudgetExceeded, estimate_tokens, gemini_budget
+from utils.logging_config import get_logger
+from utils.metrics import track_upstream
+from utils.request_context import record_upstream
+from utils.tool_runs import record_model_usage
+
+logger = get_logger(__name__)
+
+# Upstream quota errors drain the budget for this long (seconds)
+QUOTA_BACKOFF_SECONDS = 60
+
+# Per-call timeouts; a timeout counts as overload for the adaptive limits
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "120"))
+IMAGEN_TIMEOUT = float(os.getenv("IMAGEN_TIMEOUT", "180"))
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Whether an upstream error means the model quota is exhausted"""
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+        if isinstance(error, (ResourceExhausted, TooManyRequests)):
+            return True
+    except ImportError:
+        pass
+    message = str(error).lower()
+    return "quota" in message or "429" in message
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Errors that mean the upstream wants less concurrency"""
+    return isinstance(error, asyncio.TimeoutError) or is_quota_error(error)
+
+
+# Adaptive concurrency for outbound model calls
+gemini_limiter = AIMDLimiter(
+    "gemini",
+    initial_limit=int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "8")),
+    min_limit=1,
+    max_limit=int(os.getenv("GEMINI_MAX_CONCURRENCY", "64")),
+    latency_target=float(os.getenv("GEMINI_LATENCY_TARGET", "15")),
+    is_overload=is_overload_error
+)
+imagen_limiter = AIMDLimiter(
+    "imagen",
+    initial_limit=int(os.getenv("IMAGEN_INITIAL_CONCURRENCY", "2")),
+    min_limit=1,
+    max_limit=int(os.getenv("IMAGEN_MAX_CONCURRENCY", "16")),
+    latency_target=float(os.getenv("IMAGEN_LATENCY_TARGET", "20")),
+    is_overload=is_overload_error
+)
+
+
+async def generate_content(model, prompt: str):
+    """Call a Gemini model after spending from the shared token budget"""
+    estimated = estimate_tokens(prompt)
+    await gemini_budget.acquire(estimated)
+
+    started_at = time.perf_counter()
+    try:
+        async with gemini_limiter.slot():
+            with track_upstream("gemini", model=getattr(model, "model_name", None)):
+                response = await asyncio.wait_for(model.generate_content_async(prompt), timeout=GEMINI_TIMEOUT)
+    except Exception as e:
+        if is_quota_error(e):
+            logger.warning("Gemini quota exhausted upstream: %s", e)
+            await gemini_budget.drain()
+            raise LLMBudgetExceeded(QUOTA_BACKOFF_SECONDS) from e
+        raise
+    finally:
+        record_upstream(time.perf_counter() - started_at)
+
+    usage = getattr(response, "usage_metadata", None)
+    record_model_usage(getattr(model, "model_name", None), usage)
+    actual = getattr(usage, "total_token_count", None) if usage else None
+    if actual:
+        await gemini_budget.reconcile(estimated, actual)
+
+    return response
+
+
+async def generate_images(model, **kwargs):
+    """Run a blocking Imagen call off the event loop under the adaptive limit"""
+    started_at = time.perf_counter()
+    try:
+        async with imagen_limiter.slot():
+            with track_upstream("imagen"):
+                return await asyncio.wait_for(
+                    asyncio.to_thread(model.generate_images, **kwargs), timeout=IMAGEN_TIMEOUT
+                )
+    finally:
+        record_upstream(time.perf_counter() - started_at)
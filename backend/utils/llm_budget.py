@@ -0,0 +1,221 @@
+import asyncio
+import math
+import os
+import time
+from typing import Dict
+from fastapi import HTTPException, status
+from utils.localization import get_localized_message
+from utils.logging_config import get_logger
+from utils.metrics import llm_budget_rejections, llm_budget_requests_available, llm_budget_tokens_available
+
+logger = get_logger(__name__)
+
+# Upstream quota for Gemini, shared by all agents
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "1000"))
+
+# Longest a caller waits for budget before failing fast
+LLM_BUDGET_MAX_WAIT = float(os.getenv("LLM_BUDGET_MAX_WAIT", "10"))
+
+# "memory" (per process) or "redis" (shared by all workers, uses REDIS_URL)
+LLM_BUDGET_BACKEND = os.getenv("LLM_BUDGET_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Token estimate: ~4 characters per token plus the expected completion size
+CHARS_PER_TOKEN = 4
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "2048"))
+
+
+class LLMBudgetExceeded(HTTPException):
+    """The model budget cannot cover a call within the allowed wait"""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=get_localized_message("LLM_BUDGET_EXHAUSTED"),
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+def estimate_tokens(prompt: str) -> int:
+    """Rough prompt + completion token count used to reserve budget"""
+    return math.ceil(len(prompt) / CHARS_PER_TOKEN) + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBudget:
+    """Tokens-per-minute and requests-per-minute buckets for one process.
+
+    Callers reserve up front (the bucket may go into debt) and then sleep off
+    their share of the debt, so waiters are served in arrival order.
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int, max_wait: float = LLM_BUDGET_MAX_WAIT):
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.max_wait = max_wait
+        self._tokens = float(tokens_per_minute)
+        self._requests = float(requests_per_minute)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.rejections = 0
+        self._publish()
+
+    def _publish(self):
+        """Mirror the buckets in the Prometheus gauges"""
+        llm_budget_tokens_available.set(self._tokens)
+        llm_budget_requests_available.set(self._requests)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+
+    def _wait_for(self, tokens: int) -> float:
+        """Seconds until both buckets can cover the call"""
+        token_wait = max(0.0, tokens - self._tokens) * 60 / self.tokens_per_minute
+        request_wait = max(0.0, 1 - self._requests) * 60 / self.requests_per_minute
+        return max(token_wait, request_wait)
+
+    async def _reserve(self, tokens: int, max_wait: float) -> float:
+        async with self._lock:
+            self._refill()
+            wait = self._wait_for(tokens)
+            if wait > max_wait:
+                self.rejections += 1
+                llm_budget_rejections.inc()
+                self._publish()
+                raise LLMBudgetExceeded(wait)
+            self._tokens -= tokens
+            self._requests -= 1
+            self._publish()
+            return wait
+
+    async def acquire(self, tokens: int, max_wait: float = None):
+        """Spend budget for one call, waiting up to max_wait for it to refill"""
+        wait = await self._reserve(tokens, self.max_wait if max_wait is None else max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    async def reconcile(self, estimated: int, actual: int):
+        """Credit back (or charge) the difference once real usage is known"""
+        async with self._lock:
+            self._tokens = min(self.tokens_per_minute, self._tokens + estimated - actual)
+            self._publish()
+
+    async def drain(self):
+        """Upstream said quota is gone: stop spending until the bucket refills"""
+        async with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+            self._requests = min(self._requests, 0.0)
+            self._publish()
+
+    def snapshot(self) -> Dict:
+        self._refill()
+        return {
+            "backend": "memory",
+            "tokens_per_minute": self.tokens_per_minute,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_available": int(self._tokens),
+            "requests_available": round(self._requests, 2),
+            "rejections": self.rejections,
+        }
+
+
+class RedisTokenBudget(TokenBudget):
+    """Same buckets kept in Redis so every worker spends from one budget"""
+
+    KEY = "llm_budget:gemini"
+
+    # Refill, check and reserve atomically; returns the wait in ms or -wait when rejected
+    RESERVE_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local tpm = tonumber(ARGV[1])
+    local rpm = tonumber(ARGV[2])
+    local tokens = tonumber(ARGV[3])
+    local max_wait = tonumber(ARGV[4])
+
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'requests', 'updated_at')
+    local available_tokens = tonumber(state[1]) or tpm
+    local available_requests = tonumber(state[2]) or rpm
+    local updated_at = tonumber(state[3]) or now
+
+    local elapsed = math.max(0, now - updated_at)
+    available_tokens = math.min(tpm, available_tokens + elapsed * tpm / 60)
+    available_requests = math.min(rpm, available_requests + elapsed * rpm / 60)
+
+    local wait = math.max(
+        math.max(0, tokens - available_tokens) * 60 / tpm,
+        math.max(0, 1 - available_requests) * 60 / rpm
+    )
+    if wait > max_wait then
+        redis.call('HSET', KEYS[1], 'tokens', available_tokens, 'requests', available_requests, 'updated_at', now)
+        redis.call('EXPIRE', KEYS[1], 120)
+        return -math.ceil(wait * 1000)
+    end
+
+    redis.call('HSET', KEYS[1], 'tokens', available_tokens - tokens, 'requests', available_requests - 1, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+    return math.ceil(wait * 1000)
+    """
+
+    DRAIN_SCRIPT = """
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    redis.call('HSET', KEYS[1], 'tokens', 0, 'requests', 0, 'updated_at', now)
+    redis.call('EXPIRE', KEYS[1], 120)
+    return 1
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int, max_wait: float = LLM_BUDGET_MAX_WAIT,
+                 url: str = REDIS_URL):
+        super().__init__(tokens_per_minute, requests_per_minute, max_wait)
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+        self._reserve_script = self._redis.register_script(self.RESERVE_SCRIPT)
+        self._drain_script = self._redis.register_script(self.DRAIN_SCRIPT)
+
+    def _publish(self):
+        # The buckets live in Redis; per-process gauges would only double count them
+        pass
+
+    async def _reserve(self, tokens: int, max_wait: float) -> float:
+        result = int(await self._reserve_script(
+            keys=[self.KEY],
+            args=[self.tokens_per_minute, self.requests_per_minute, tokens, max_wait]
+        ))
+        if result < 0:
+            self.rejections += 1
+            llm_budget_rejections.inc()
+            raise LLMBudgetExceeded(-result / 1000)
+        return result / 1000
+
+    async def reconcile(self, estimated: int, actual: int):
+        await self._redis.hincrbyfloat(self.KEY, "tokens", estimated - actual)
+
+    async def drain(self):
+        await self._drain_script(keys=[self.KEY])
+
+    def snapshot(self) -> Dict:
+        return {
+            "backend": "redis",
+            "tokens_per_minute": self.tokens_per_minute,
+            "requests_per_minute": self.requests_per_minute,
+            "rejections": self.rejections,
+        }
+
+
+def create_token_budget() -> TokenBudget:
+    """Budget for the configured LLM_BUDGET_BACKEND"""
+    if LLM_BUDGET_BACKEND == "redis":
+        logger.info("Gemini budget is shared through Redis")
+        return RedisTokenBudget(GEMINI_TOKENS_PER_MINUTE, GEMINI_REQUESTS_PER_MINUTE)
+    return TokenBudget(GEMINI_TOKENS_PER_MINUTE, GEMINI_REQUESTS_PER_MINUTE)
+
+
+# Process-wide Gemini budget
+gemini_budget = create_token_budget()
@@ -108,6 +108,34 @@ MESSAGES: Dict[str, Dict[str, str]] = {
         "en": "Resource not found.",
         "tr": "Kaynak bulunamadı."
     },
+    "AUTH_BUSY": {
+        "en": "Authentication service is busy. Please try again shortly.",
+        "tr": "Kimlik doğrulama servisi meşgul. Lütfen kısa süre sonra tekrar deneyin."
+    },
+    "WORKSPACE_BUSY": {
+        "en": "This workspace has too many requests in progress. Please try again shortly.",
+        "tr": "Bu çalışma alanında çok fazla işlem sürüyor. Lütfen kısa süre sonra tekrar deneyin."
+    },
+    "LLM_BUDGET_EXHAUSTED": {
+        "en": "AI capacity is temporarily exhausted. Please try again shortly.",
+        "tr": "Yapay zeka kapasitesi geçici olarak doldu. Lütfen kısa süre sonra tekrar deneyin."
+    },
+    "INVALID_CURSOR": {
+        "en": "Invalid pagination cursor.",
+        "tr": "Geçersiz sayfalama imleci."
+    },
+    "INVALID_EXPORT_TOOLS": {
+        "en": "Unknown tool requested for export.",
+        "tr": "Dışa aktarma için bilinmeyen araç istendi."
+    },
+    "INVALID_TOOL": {
+        "en": "Unknown tool requested.",
+        "tr": "Bilinmeyen araç istendi."
+    },
+    "INVALID_RESPONSE_FIELDS": {
+        "en": "Unknown or empty response fields requested.",
+        "tr": "Bilinmeyen veya boş yanıt alanları istendi."
+    },
     
     # TrendAgent related messages
     "trend_suggestion_limit_reached": {
@@ -122,6 +150,10 @@ MESSAGES: Dict[str, Dict[str, str]] = {
         "en": "Trend suggestion not found.",
         "tr": "Trend önerisi bulunamadı."
     },
+    "workspace_limit_reached": {
+        "en": "Workspace limit reached. Maximum 3 campaigns allowed per workspace.",
+        "tr": "Çalışma alanı limitine ulaşıldı. Her çalışma alanı için en fazla 3 kampanya oluşturulabilir."
+    },
     "suggestion_deleted": {
         "en": "Trend suggestion deleted successfully.",
         "tr": "Trend önerisi başarıyla silindi."
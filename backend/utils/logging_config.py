@@ -1,6 +1,8 @@
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 from datetime import datetime
 from pathlib import Path
 
@@ -12,6 +14,7 @@ logs_dir.mkdir(exist_ok=True)
 app_log_file = logs_dir / "app.log"
 error_log_file = logs_dir / "error.log"
 access_log_file = logs_dir / "access.log"
+traces_log_file = logs_dir / "traces.log"
 
 # Log format
 log_format = logging.Formatter(
@@ -26,21 +29,76 @@ error_format = logging.Formatter(
 )
 
 
+# Records are queued in memory and written by background listener threads
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# "drop": discard records when the queue is full; "block": wait for space
+LOG_QUEUE_POLICY = os.getenv("LOG_QUEUE_POLICY", "drop").lower()
+LOG_QUEUE_BLOCK_TIMEOUT = float(os.getenv("LOG_QUEUE_BLOCK_TIMEOUT", "1.0"))
+
+_listeners = []
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops or briefly blocks when the queue is full.
+
+    Errors are never dropped outright; they wait up to the block timeout.
+    """
+
+    def __init__(self, log_queue: queue.Queue, block: bool):
+        super().__init__(log_queue)
+        self.block = block
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        
+        if self.block or record.levelno >= logging.ERROR:
+            try:
+                self.queue.put(record, timeout=LOG_QUEUE_BLOCK_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+        self.dropped += 1
+
+
+def _queue_handlers(logger: logging.Logger, *handlers: logging.Handler) -> BoundedQueueHandler:
+    """Route a logger through a bounded queue to handlers run by a listener thread"""
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = BoundedQueueHandler(log_queue, block=LOG_QUEUE_POLICY == "block")
+    logger.addHandler(queue_handler)
+    
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append((logger, listener, queue_handler))
+    return queue_handler
+
+
+def _clear_handlers(logger: logging.Logger):
+    """Detach and close a logger's handlers (e.g. those restored by stop_logging)"""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
 def setup_logging():
     """Setup logging configuration for the application"""
+    stop_logging()
     
     # Root logger configuration
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.INFO)
     
     # Clear existing handlers
-    root_logger.handlers.clear()
+    _clear_handlers(root_logger)
     
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(log_format)
-    root_logger.addHandler(console_handler)
     
     # File handler for general logs
     file_handler = logging.handlers.RotatingFileHandler(
@@ -50,7 +108,6 @@ def setup_logging():
     )
     file_handler.setLevel(logging.INFO)
     file_handler.setFormatter(log_format)
-    root_logger.addHandler(file_handler)
     
     # Error file handler
     error_handler = logging.handlers.RotatingFileHandler(
@@ -60,7 +117,9 @@ def setup_logging():
     )
     error_handler.setLevel(logging.ERROR)
     error_handler.setFormatter(error_format)
-    root_logger.addHandler(error_handler)
+    
+    # Disk writes and rotation happen on the listener thread, not the event loop
+    _queue_handlers(root_logger, console_handler, file_handler, error_handler)
     
     # Access log handler
     access_handler = logging.handlers.RotatingFileHandler(
@@ -69,19 +128,71 @@ def setup_logging():
         backupCount=5
     )
     access_handler.setLevel(logging.INFO)
-    access_handler.setFormatter(log_format)
+    # Access records are already JSON lines
+    access_handler.setFormatter(logging.Formatter('%(message)s'))
     
     # Create access logger
     access_logger = logging.getLogger("access")
     access_logger.setLevel(logging.INFO)
-    access_logger.addHandler(access_handler)
+    _clear_handlers(access_logger)
+    _queue_handlers(access_logger, access_handler)
     access_logger.propagate = False
     
+    # Trace handler (written only when TRACE_EXPORTER=file)
+    traces_handler = logging.handlers.RotatingFileHandler(
+        traces_log_file,
+        maxBytes=10*1024*1024,  # 10MB
+        backupCount=5,
+        delay=True
+    )
+    traces_handler.setLevel(logging.INFO)
+    traces_handler.setFormatter(logging.Formatter('%(message)s'))
+    
+    traces_logger = logging.getLogger("traces")
+    traces_logger.setLevel(logging.INFO)
+    _clear_handlers(traces_logger)
+    _queue_handlers(traces_logger, traces_handler)
+    traces_logger.propagate = False
+    
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.WARNING)
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
 
 
+def stop_logging():
+    """Flush queued records, stop the listener threads and log synchronously again.
+
+    Each logger gets its real handlers back, so records written after this
+    (e.g. during shutdown) are still kept instead of queued with no reader.
+    """
+    dropped = 0
+    while _listeners:
+        logger, listener, queue_handler = _listeners.pop()
+        listener.stop()
+        logger.removeHandler(queue_handler)
+        for handler in listener.handlers:
+            logger.addHandler(handler)
+        dropped += queue_handler.dropped
+    
+    if dropped:
+        logging.getLogger(__name__).warning("Logging dropped %d records (queue full)", dropped)
+
+
+def get_logging_status() -> dict:
+    """Queue depth and dropped records per logging queue"""
+    return {
+        "policy": LOG_QUEUE_POLICY,
+        "queue_size": LOG_QUEUE_SIZE,
+        "queues": [
+            {"queued": queue_handler.queue.qsize(), "dropped": queue_handler.dropped}
+            for _, _, queue_handler in _listeners
+        ]
+    }
+
+
+atexit.register(stop_logging)
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with the given name"""
     return logging.getLogger(name)
@@ -0,0 +1,107 @@
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Tuple
+from utils.cache import TTLCache, MISSING
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Backend selection: "memory" (per process) or "redis" (shared by all workers)
+LOGIN_ATTEMPT_BACKEND = os.getenv("LOGIN_ATTEMPT_BACKEND", "memory").lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LOGIN_ATTEMPT_CACHE_SIZE = int(os.getenv("LOGIN_ATTEMPT_CACHE_SIZE", "100000"))
+LOGIN_ATTEMPT_KEY_PREFIX = "login_attempts:"
+
+
+class LoginAttemptStore(ABC):
+    """Failed-login counters that expire a fixed window after the first failure"""
+
+    def __init__(self, window: int):
+        self.window = window
+
+    @abstractmethod
+    async def increment(self, key: str) -> int:
+        """Count one failure and return the total in the current window"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Tuple[int, int]:
+        """Failures in the current window and seconds until it expires"""
+
+    @abstractmethod
+    async def reset(self, key: str):
+        """Forget all failures for key"""
+
+
+class MemoryLoginAttemptStore(LoginAttemptStore):
+    """Per-process store: bounded LRU whose entries expire with their window"""
+
+    def __init__(self, window: int, maxsize: int = LOGIN_ATTEMPT_CACHE_SIZE):
+        super().__init__(window)
+        self._entries = TTLCache(maxsize=maxsize, ttl=window)
+
+    def _current(self, key: str):
+        entry = self._entries.get(key)
+        if entry is MISSING or entry[1] <= time.time():
+            return None
+        return entry
+
+    async def increment(self, key: str) -> int:
+        entry = self._current(key)
+        if entry is None:
+            entry = (0, time.time() + self.window)
+        entry = (entry[0] + 1, entry[1])
+        self._entries.set(key, entry)
+        return entry[0]
+
+    async def get(self, key: str) -> Tuple[int, int]:
+        entry = self._current(key)
+        if entry is None:
+            return 0, 0
+        return entry[0], int(entry[1] - time.time())
+
+    async def reset(self, key: str):
+        self._entries.pop(key)
+
+
+class RedisLoginAttemptStore(LoginAttemptStore):
+    """Shared store: atomic INCR with an expiry set on the first failure"""
+
+    # INCR and EXPIRE in one round trip, so no counter is left without a TTL
+    INCREMENT_SCRIPT = """
+    local count = redis.call('INCR', KEYS[1])
+    if count == 1 then
+        redis.call('EXPIRE', KEYS[1], ARGV[1])
+    end
+    return count
+    """
+
+    def __init__(self, window: int, url: str = REDIS_URL):
+        super().__init__(window)
+        import redis.asyncio as redis
+        self._redis = redis.from_url(url)
+        self._increment = self._redis.register_script(self.INCREMENT_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return LOGIN_ATTEMPT_KEY_PREFIX + key
+
+    async def increment(self, key: str) -> int:
+        return int(await self._increment(keys=[self._key(key)], args=[self.window]))
+
+    async def get(self, key: str) -> Tuple[int, int]:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            count, ttl = await pipe.get(self._key(key)).ttl(self._key(key)).execute()
+        if count is None:
+            return 0, 0
+        return int(count), max(int(ttl), 0)
+
+    async def reset(self, key: str):
+        await self._redis.delete(self._key(key))
+
+
+def create_login_attempt_store(window: int) -> LoginAttemptStore:
+    """Store for the configured LOGIN_ATTEMPT_BACKEND"""
+    if LOGIN_ATTEMPT_BACKEND == "redis":
+        logger.info("Failed-login tracking uses Redis")
+        return RedisLoginAttemptStore(window)
+    return MemoryLoginAttemptStore(window)
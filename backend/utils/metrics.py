@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+import prometheus_client as prom
+from prometheus_client import multiprocess
+from utils.tracing import span
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bounds"""
+
+    def __init__(self, buckets: Optional[Iterable[float]] = None):
+        self.buckets = tuple(sorted(buckets or DEFAULT_BUCKETS))
+        self._counts = [0] * len(self.buckets)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record a single observation"""
+        with self._lock:
+            self._count += 1
+            self._sum += value
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self._counts[index] += 1
+                    break
+
+    def snapshot(self) -> Dict:
+        """Return cumulative bucket counts, total count and sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            value_sum = self._sum
+
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = total
+
+        return {"buckets": cumulative, "count": total, "sum": round(value_sum, 6)}
+
+
+# Prometheus metrics, exposed in text format at /metrics.
+# With PROMETHEUS_MULTIPROC_DIR set (an empty directory, cleared before the
+# server starts), every uvicorn worker writes its values to files there and a
+# scrape of any worker aggregates all of them.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+UPSTREAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 20.0, 30.0, 60.0, 120.0)
+
+http_request_duration = prom.Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=DEFAULT_BUCKETS
+)
+http_requests_in_flight = prom.Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum"
+)
+
+upstream_request_duration = prom.Histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to external services",
+    ["upstream"],
+    buckets=UPSTREAM_BUCKETS
+)
+upstream_errors = prom.Counter(
+    "upstream_errors_total",
+    "Failed calls to external services by exception type",
+    ["upstream", "error"]
+)
+
+db_pool_size = prom.Gauge("db_pool_size", "Configured connection pool size", multiprocess_mode="livesum")
+db_pool_checked_out = prom.Gauge(
+    "db_pool_checked_out", "Connections currently checked out", multiprocess_mode="livesum"
+)
+db_pool_overflow = prom.Gauge("db_pool_overflow", "Overflow connections in use", multiprocess_mode="livesum")
+db_pool_wait = prom.Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+)
+db_pool_timeouts = prom.Counter("db_pool_timeouts_total", "Connection checkouts that timed out")
+
+upstream_concurrency_limit = prom.Gauge(
+    "upstream_concurrency_limit",
+    "Adaptive (AIMD) concurrency limit per upstream limiter",
+    ["limiter"],
+    multiprocess_mode="livesum"
+)
+upstream_concurrency_in_flight = prom.Gauge(
+    "upstream_concurrency_in_flight",
+    "Upstream calls holding a limiter slot",
+    ["limiter"],
+    multiprocess_mode="livesum"
+)
+upstream_limiter_latency = prom.Histogram(
+    "upstream_limiter_latency_seconds",
+    "Time calls held a limiter slot",
+    ["limiter"],
+    buckets=UPSTREAM_BUCKETS
+)
+upstream_limit_decreases = prom.Counter(
+    "upstream_limit_decreases_total",
+    "Multiplicative cuts of a limiter's concurrency limit",
+    ["limiter"]
+)
+
+llm_budget_tokens_available = prom.Gauge(
+    "llm_budget_tokens_available",
+    "Tokens left in the per-minute model budget (in-memory backend)",
+    multiprocess_mode="livesum"
+)
+llm_budget_requests_available = prom.Gauge(
+    "llm_budget_requests_available",
+    "Requests left in the per-minute model budget (in-memory backend)",
+    multiprocess_mode="livesum"
+)
+llm_budget_rejections = prom.Counter(
+    "llm_budget_rejections_total",
+    "Model calls refused because the budget could not cover them in time"
+)
+
+
+@contextmanager
+def track_upstream(upstream: str, **attributes):
+    """Time one external call (also as a trace span) and count it as an error if the block raises"""
+    started_at = time.perf_counter()
+    try:
+        with span(upstream, **attributes):
+            yield
+    except BaseException as e:
+        upstream_errors.labels(upstream, type(e).__name__).inc()
+        raise
+    finally:
+        upstream_request_duration.labels(upstream).observe(time.perf_counter() - started_at)
+
+
+def observe_request(method: str, route: str, status_code: int, duration: float):
+    """Record one handled HTTP request"""
+    http_request_duration.labels(method, route, str(status_code)).observe(duration)
+
+
+def render_metrics() -> bytes:
+    """All metrics in the Prometheus text format, merged across workers when multiprocess"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = prom.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return prom.generate_latest(registry)
+    return prom.generate_latest()
+
+
+def mark_worker_exit():
+    """Drop this worker's live gauges from the multiprocess files"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
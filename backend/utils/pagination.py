@@ -0,0 +1,66 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, status, Request, Response
+from sqlalchemy import tuple_
+from utils.localization import get_localized_message
+
+# Page size limits for list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Lists keep their JSON shape; the cursor for the next page travels in a header
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, request: Request = None) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=get_localized_message("INVALID_CURSOR", request)
+        )
+
+
+def apply_keyset_pagination(
+    statement,
+    model,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = True,
+    request: Request = None
+):
+    """Order a select by (created_at, id), seek past the cursor and fetch one extra row"""
+    key = tuple_(model.created_at, model.id)
+
+    if cursor:
+        position = tuple_(*decode_cursor(cursor, request))
+        statement = statement.where(key < position if descending else key > position)
+
+    if descending:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(model.created_at.asc(), model.id.asc())
+
+    return statement.limit(limit + 1)
+
+
+def finalize_page(rows: List, limit: int, response: Response) -> List:
+    """Drop the look-ahead row and advertise the next cursor when there is one"""
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
@@ -0,0 +1,42 @@
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, status, Request
+from utils.localization import get_localized_message
+
+
+def parse_response_fields(
+    fields: Optional[str],
+    allowed: Iterable[str],
+    request: Request = None
+) -> Optional[List[str]]:
+    """Parse a comma separated `fields` query parameter against allowed keys"""
+    if not fields:
+        return None
+
+    allowed = set(allowed)
+    requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in requested if f not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=get_localized_message("INVALID_RESPONSE_FIELDS", request)
+        )
+    return requested
+
+
+def response_field_columns(column, fields: List[str]) -> list:
+    """Select individual keys of a JSON payload column in the database"""
+    return [column[field].label(f"response_{field}") for field in fields]
+
+
+def response_fields_from_row(
+    row,
+    fields: List[str],
+    archived: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Rebuild a partial payload dict from a row selected with response_field_columns.
+
+    Rows whose payload has been archived pass the decompressed payload instead.
+    """
+    if archived is not None:
+        return {field: archived.get(field) for field in fields}
+    return {field: row._mapping[f"response_{field}"] for field in fields}
@@ -0,0 +1,77 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from utils.logging_config import get_logger
+from utils.tracing import record_span
+
+logger = get_logger("sql.slow")
+
+# Statements slower than this are logged with their route
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_MAX_LENGTH = 1000
+# Statement prefix kept on DB trace spans
+DB_SPAN_STATEMENT_LENGTH = 200
+
+
+class QueryStats:
+    """Query count and total database time for one request"""
+
+    __slots__ = ("route", "count", "total_time")
+
+    def __init__(self, route: Optional[str] = None):
+        self.route = route
+        self.count = 0
+        self.total_time = 0.0
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start_query_tracking(route: Optional[str] = None) -> QueryStats:
+    """Start collecting query statistics for the current request"""
+    stats = QueryStats(route)
+    _current_stats.set(stats)
+    return stats
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """Statistics collected for the current request, if any"""
+    return _current_stats.get()
+
+
+def install_query_hooks(sync_engine: Engine):
+    """Attach timing hooks to an engine (use engine.sync_engine for async engines)"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start_times = conn.info.get("query_start_times")
+        if not start_times:
+            return
+        elapsed = time.perf_counter() - start_times.pop()
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.total_time += elapsed
+            record_span("db", elapsed, statement=" ".join(statement.split())[:DB_SPAN_STATEMENT_LENGTH])
+
+        if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s",
+                elapsed * 1000,
+                stats.route if stats else "background",
+                " ".join(statement.split())[:SLOW_QUERY_MAX_LENGTH]
+            )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start_times"):
+            connection.info["query_start_times"].pop()
@@ -0,0 +1,144 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+import anyio
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from models.usage import UsageCounter
+
+# Quota subjects
+WORKSPACE_SCOPE = "workspace"
+USER_SCOPE = "user"
+
+# Counted resources and their limits
+TREND_SUGGESTIONS = "trend_suggestions"
+AD_CAMPAIGNS = "adcreative_campaigns"
+OWNED_WORKSPACES = "workspaces"
+
+TREND_SUGGESTION_LIMIT = 3
+AD_CAMPAIGN_LIMIT = 3
+WORKSPACE_LIMIT = 3
+
+# A counter untouched for this long has no reservation in flight, so a denied
+# request may lower it to the rows that really exist (longer than any tool run)
+QUOTA_RECONCILE_AFTER = timedelta(seconds=int(os.getenv("QUOTA_RECONCILE_AFTER", "900")))
+
+
+def _counter_filter(scope: str, scope_id: int, resource: str) -> tuple:
+    return (
+        UsageCounter.scope == scope,
+        UsageCounter.scope_id == scope_id,
+        UsageCounter.resource == resource
+    )
+
+
+async def _increment(session: AsyncSession, scope: str, scope_id: int, resource: str, limit: int) -> Optional[int]:
+    """Take one unit if the counter exists and is below the limit; returns the new usage"""
+    result = await session.exec(
+        update(UsageCounter)
+        .where(*_counter_filter(scope, scope_id, resource), UsageCounter.used < limit)
+        .values(used=UsageCounter.used + 1, updated_at=datetime.utcnow())
+        .returning(UsageCounter.used)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _seed_counter(session: AsyncSession, scope: str, scope_id: int, resource: str, count_existing):
+    """Create a missing counter starting from the rows that already exist"""
+    used = (await session.exec(count_existing)).one()
+    values = {"scope": scope, "scope_id": scope_id, "resource": resource, "used": used}
+    dialect = session.bind.dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        await session.exec(insert(UsageCounter).values(**values).on_conflict_do_nothing())
+        return
+
+    try:
+        async with session.begin_nested():
+            session.add(UsageCounter(**values))
+    except IntegrityError:
+        # Another request seeded it first
+        pass
+
+
+async def _reconcile(session: AsyncSession, scope: str, scope_id: int, resource: str, count_existing) -> bool:
+    """Lower a stale counter to the existing row count; returns whether units were freed"""
+    now = datetime.utcnow()
+    actual = (await session.exec(count_existing)).one()
+    result = await session.exec(
+        update(UsageCounter)
+        .where(
+            *_counter_filter(scope, scope_id, resource),
+            UsageCounter.used > actual,
+            UsageCounter.updated_at < now - QUOTA_RECONCILE_AFTER
+        )
+        .values(used=actual, updated_at=now)
+    )
+    return result.rowcount > 0
+
+
+async def reserve_quota(
+    session: AsyncSession,
+    scope: str,
+    scope_id: int,
+    resource: str,
+    limit: int,
+    count_existing
+) -> bool:
+    """
+    Atomically reserve one unit of quota.
+    
+    A single conditional UPDATE takes the unit, so concurrent requests cannot
+    overspend. The counter is seeded from `count_existing` (a count select)
+    the first time a subject is seen, and re-counted when a request is denied
+    by a counter idle for QUOTA_RECONCILE_AFTER, so units leaked by a crashed
+    request come back. The caller commits; roll back or call release_quota
+    when the reserved work fails.
+    """
+    used = await _increment(session, scope, scope_id, resource, limit)
+    if used is not None:
+        return True
+
+    exists = (await session.exec(
+        select(UsageCounter.used).where(*_counter_filter(scope, scope_id, resource))
+    )).first()
+    if exists is not None:
+        if await _reconcile(session, scope, scope_id, resource, count_existing):
+            return await _increment(session, scope, scope_id, resource, limit) is not None
+        return False
+
+    await _seed_counter(session, scope, scope_id, resource, count_existing)
+    return await _increment(session, scope, scope_id, resource, limit) is not None
+
+
+async def release_quota(session: AsyncSession, scope: str, scope_id: int, resource: str):
+    """Give back one unit of quota (the caller commits)"""
+    await session.exec(
+        update(UsageCounter)
+        .where(*_counter_filter(scope, scope_id, resource), UsageCounter.used > 0)
+        .values(used=UsageCounter.used - 1, updated_at=datetime.utcnow())
+    )
+
+
+async def release_failed_reservation(session: AsyncSession, scope: str, scope_id: int, resource: str):
+    """Roll back and return a committed reservation whose work failed.
+
+    Shielded so a client disconnect cancelling the request can't skip it.
+    """
+    with anyio.CancelScope(shield=True):
+        await session.rollback()
+        await release_quota(session, scope, scope_id, resource)
+        await session.commit()
+
+
+async def clear_quotas(session: AsyncSession, scope: str, scope_id: int):
+    """Drop every counter of a deleted subject (the caller commits)"""
+    await session.exec(
+        delete(UsageCounter).where(UsageCounter.scope == scope, UsageCounter.scope_id == scope_id)
+    )
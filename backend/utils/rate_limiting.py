@@ -1,73 +1,99 @@
-import time
-from typing import Dict, Optional
+import os
 from fastapi import HTTPException, status, Request
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from utils.logging_config import get_logger
+from utils.login_attempts import create_login_attempt_store
+from utils.security import decode_access_token
 
 logger = get_logger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Shared limit storage ("memory://" per process, "redis://host:6379" across workers)
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", "memory://")
+# "moving-window" (sliding), "fixed-window" or "fixed-window-elastic-expiry"
+RATE_LIMIT_STRATEGY = os.getenv("RATE_LIMIT_STRATEGY", "moving-window")
 
-# In-memory storage for failed login attempts (in production, use Redis)
-failed_login_attempts: Dict[str, Dict] = {}
+# Per-route policies in limits syntax; several limits are joined with ";"
+AUTH_RATE_LIMIT = os.getenv("AUTH_RATE_LIMIT", "5/minute")
+TREND_RATE_LIMIT_USER = os.getenv("TREND_RATE_LIMIT_USER", "10/minute")
+TREND_RATE_LIMIT_WORKSPACE = os.getenv("TREND_RATE_LIMIT_WORKSPACE", "20/minute;200/day")
+SEO_RATE_LIMIT_USER = os.getenv("SEO_RATE_LIMIT_USER", "10/minute")
+SEO_RATE_LIMIT_WORKSPACE = os.getenv("SEO_RATE_LIMIT_WORKSPACE", "20/minute;200/day")
+ADCREATIVE_RATE_LIMIT_USER = os.getenv("ADCREATIVE_RATE_LIMIT_USER", "3/minute")
+ADCREATIVE_RATE_LIMIT_WORKSPACE = os.getenv("ADCREATIVE_RATE_LIMIT_WORKSPACE", "10/minute;50/day")
+
+
+def user_key(request: Request) -> str:
+    """Rate limit key for the authenticated user, falling back to the client IP"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        claims = decode_access_token(token)
+        if claims:
+            return f"user:{claims.get('uid') or claims['sub']}"
+    return f"ip:{get_remote_address(request)}"
+
+
+def workspace_key(request: Request) -> str:
+    """Rate limit key for the workspace addressed by the request"""
+    slug = request.path_params.get("workspace_slug") or request.query_params.get("workspace_slug")
+    if slug:
+        return f"workspace:{slug}"
+    return user_key(request)
+
+
+# Single limiter for the whole app; routes pick their key function
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy=RATE_LIMIT_STRATEGY
+)
 
 # Configuration
 MAX_LOGIN_ATTEMPTS = 5
 LOGIN_BLOCK_DURATION = 300  # 5 minutes
 
+# Failed login attempts, per process or shared through Redis (LOGIN_ATTEMPT_BACKEND)
+login_attempt_store = create_login_attempt_store(LOGIN_BLOCK_DURATION)
 
-def check_login_attempts(email: str) -> bool:
+
+async def check_login_attempts(email: str) -> bool:
     """Check if user is blocked due to too many failed login attempts"""
-    if email in failed_login_attempts:
-        attempts = failed_login_attempts[email]
-        
-        # Check if still blocked
-        if attempts['count'] >= MAX_LOGIN_ATTEMPTS:
-            time_since_first = time.time() - attempts['first_attempt']
-            if time_since_first < LOGIN_BLOCK_DURATION:
-                remaining_time = int(LOGIN_BLOCK_DURATION - time_since_first)
-                logger.warning(f"Login blocked for {email}. Remaining time: {remaining_time}s")
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail=f"Too many failed login attempts. Try again in {remaining_time} seconds."
-                )
-            else:
-                # Reset after block duration
-                failed_login_attempts.pop(email, None)
-                logger.info(f"Login block expired for {email}")
+    try:
+        count, remaining_time = await login_attempt_store.get(email)
+    except Exception as e:
+        # Tracking outages must not lock everyone out
+        logger.error("Login attempt store unavailable: %s", e)
+        return True
+    
+    if count >= MAX_LOGIN_ATTEMPTS and remaining_time > 0:
+        logger.warning("Login blocked for %s. Remaining time: %ss", email, remaining_time)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many failed login attempts. Try again in {remaining_time} seconds."
+        )
     
     return True
 
 
-def record_failed_login(email: str):
+async def record_failed_login(email: str):
     """Record a failed login attempt"""
-    current_time = time.time()
-    
-    if email not in failed_login_attempts:
-        failed_login_attempts[email] = {
-            'count': 1,
-            'first_attempt': current_time,
-            'last_attempt': current_time
-        }
-    else:
-        attempts = failed_login_attempts[email]
-        attempts['count'] += 1
-        attempts['last_attempt'] = current_time
+    try:
+        count = await login_attempt_store.increment(email)
+    except Exception as e:
+        logger.error("Login attempt store unavailable: %s", e)
+        return
     
-    logger.warning(f"Failed login attempt for {email}. Total attempts: {failed_login_attempts[email]['count']}")
+    logger.warning("Failed login attempt for %s. Total attempts: %s", email, count)
 
 
-def record_successful_login(email: str):
+async def record_successful_login(email: str):
     """Record a successful login and reset failed attempts"""
-    if email in failed_login_attempts:
-        failed_login_attempts.pop(email)
-        logger.info(f"Successful login for {email}. Failed attempts reset.")
-
-
-
+    try:
+        await login_attempt_store.reset(email)
+    except Exception as e:
+        logger.error("Login attempt store unavailable: %s", e)
 
 
 def setup_rate_limiting(app):
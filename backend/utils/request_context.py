@@ -0,0 +1,43 @@
+import re
+import uuid
+from contextvars import ContextVar
+from typing import Optional
+
+# Incoming request ids are echoed back only if they look like ids
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestContext:
+    """Request id and upstream model time for one request"""
+
+    __slots__ = ("request_id", "upstream_time", "upstream_calls")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.upstream_time = 0.0
+        self.upstream_calls = 0
+
+
+_current_context: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def start_request(request_id: Optional[str] = None) -> RequestContext:
+    """Start a context for the current request, reusing a well-formed client id"""
+    if not request_id or not REQUEST_ID_PATTERN.match(request_id):
+        request_id = uuid.uuid4().hex
+    context = RequestContext(request_id)
+    _current_context.set(context)
+    return context
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """Context of the current request, if any"""
+    return _current_context.get()
+
+
+def record_upstream(seconds: float):
+    """Add one upstream model call to the current request"""
+    context = _current_context.get()
+    if context is not None:
+        context.upstream_calls += 1
+        context.upstream_time += seconds
@@ -1,15 +1,25 @@
 import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Request
+from utils.localization import get_localized_message
+from utils.metrics import Histogram
 
 # JWT Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "my_default_secret_key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Embed the user's workspace memberships in access tokens (opt-in)
+JWT_MEMBERSHIP_CLAIMS = os.getenv("JWT_MEMBERSHIP_CLAIMS", "false").lower() in ("1", "true", "yes")
+# Users in more workspaces than this get plain tokens and database checks
+JWT_MAX_WORKSPACE_CLAIMS = int(os.getenv("JWT_MAX_WORKSPACE_CLAIMS", "50"))
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -24,6 +34,77 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# Dedicated bcrypt executor so auth bursts don't starve the shared threadpool.
+# bcrypt releases the GIL, so threads hash in parallel.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "64"))
+PASSWORD_HASH_RETRY_AFTER = 1  # seconds
+
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_in_flight = 0  # running + queued; only touched on the event loop
+hash_rejections = 0
+
+hash_time_histogram = Histogram(buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+hash_queue_wait_histogram = Histogram(buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0))
+
+
+async def _run_hashing(func, *args, request: Request = None):
+    """Run a bcrypt call on the hashing executor, rejecting work beyond the queue limit"""
+    global _hash_in_flight, hash_rejections
+
+    if _hash_in_flight >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_LIMIT:
+        hash_rejections += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=get_localized_message("AUTH_BUSY", request),
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+        )
+
+    submitted_at = time.perf_counter()
+
+    def timed():
+        started_at = time.perf_counter()
+        hash_queue_wait_histogram.observe(started_at - submitted_at)
+        try:
+            return func(*args)
+        finally:
+            hash_time_histogram.observe(time.perf_counter() - started_at)
+
+    _hash_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, timed)
+    finally:
+        _hash_in_flight -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str, request: Request = None) -> bool:
+    """Verify a password on the hashing executor"""
+    return await _run_hashing(verify_password, plain_password, hashed_password, request=request)
+
+
+async def get_password_hash_async(password: str, request: Request = None) -> str:
+    """Hash a password on the hashing executor"""
+    return await _run_hashing(get_password_hash, password, request=request)
+
+
+def get_password_hashing_status() -> dict:
+    """Hashing executor load, rejections and timing"""
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "queue_limit": PASSWORD_HASH_QUEUE_LIMIT,
+        "in_flight": _hash_in_flight,
+        "queued": max(_hash_in_flight - PASSWORD_HASH_WORKERS, 0),
+        "rejections": hash_rejections,
+        "hash_time_seconds": hash_time_histogram.snapshot(),
+        "queue_wait_seconds": hash_queue_wait_histogram.snapshot()
+    }
+
+
+def shutdown_password_hashing():
+    """Stop the hashing executor threads"""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -37,13 +118,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verify JWT token and return email"""
+def decode_access_token(token: str) -> Optional[dict]:
+    """Verify JWT token and return its claims"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        return email
     except JWTError:
-        return None 
\ No newline at end of file
+        return None
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+
+def verify_token(token: str) -> Optional[str]:
+    """Verify JWT token and return email"""
+    payload = decode_access_token(token)
+    return payload["sub"] if payload else None
+
+
+def membership_claims(user_id: int, membership_version: int, memberships) -> dict:
+    """Compact token claims for (slug, workspace_id, role) memberships.
+
+    Claims are only trusted while `mv` matches the user's membership_version.
+    """
+    claims = {"uid": user_id, "mv": membership_version}
+    memberships = list(memberships)
+    if len(memberships) <= JWT_MAX_WORKSPACE_CLAIMS:
+        claims["ws"] = {slug: [workspace_id, role] for slug, workspace_id, role in memberships}
+    return claims 
\ No newline at end of file
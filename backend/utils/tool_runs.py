@@ -0,0 +1,178 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class ToolRun:
+    """Stage durations, retries, model and token usage of one tool run"""
+
+    __slots__ = ("stage_timings", "retry_count", "model_name", "prompt_tokens", "completion_tokens", "started_at")
+
+    def __init__(self):
+        self.stage_timings: Dict[str, float] = {}
+        self.retry_count = 0
+        self.model_name: Optional[str] = None
+        self.prompt_tokens: Optional[int] = None
+        self.completion_tokens: Optional[int] = None
+        self.started_at = time.perf_counter()
+
+    def fields(self) -> Dict[str, Any]:
+        """Column values for the tool row that stores this run"""
+        return {
+            "stage_timings": {name: round(ms, 1) for name, ms in self.stage_timings.items()},
+            "retry_count": self.retry_count,
+            "model_name": self.model_name,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+_current_run: ContextVar[Optional[ToolRun]] = ContextVar("tool_run", default=None)
+
+
+@contextmanager
+def tool_run():
+    """Collect the stages and model usage of the block into a ToolRun"""
+    run = ToolRun()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+        run.stage_timings["total"] = (time.perf_counter() - run.started_at) * 1000
+
+
+def record_stage(name: str, duration_ms: float):
+    """Add a finished stage; repeated stages (e.g. several translations) are summed"""
+    run = _current_run.get()
+    if run is not None:
+        run.stage_timings[name] = run.stage_timings.get(name, 0.0) + duration_ms
+
+
+def record_retry():
+    """Count one retry or fallback attempt of the current run"""
+    run = _current_run.get()
+    if run is not None:
+        run.retry_count += 1
+
+
+def record_model_usage(model_name: Optional[str], usage=None):
+    """Note the model that answered and add its token usage"""
+    run = _current_run.get()
+    if run is None:
+        return
+    if model_name:
+        run.model_name = model_name.split("/")[-1]
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    completion_tokens = getattr(usage, "candidates_token_count", None)
+    if prompt_tokens is not None:
+        run.prompt_tokens = (run.prompt_tokens or 0) + prompt_tokens
+    if completion_tokens is not None:
+        run.completion_tokens = (run.completion_tokens or 0) + completion_tokens
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Linearly interpolated percentile, like PostgreSQL's percentile_cont"""
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _empty_day() -> Dict[str, Any]:
+    return {"runs": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0, "stages": {}}
+
+
+async def _aggregates_postgres(session: AsyncSession, model, since: datetime) -> Dict[date, Dict[str, Any]]:
+    table = model.__tablename__
+    params = {"since": since}
+    days: Dict[date, Dict[str, Any]] = {}
+
+    summaries = (await session.exec(text(f"""
+        SELECT date_trunc('day', created_at)::date AS day,
+               count(*) AS runs,
+               coalesce(sum(retry_count), 0) AS retries,
+               coalesce(sum(prompt_tokens), 0) AS prompt_tokens,
+               coalesce(sum(completion_tokens), 0) AS completion_tokens
+        FROM {table}
+        WHERE created_at >= :since AND stage_timings IS NOT NULL
+        GROUP BY day
+    """), params=params)).all()
+    for row in summaries:
+        days[row.day] = {
+            "runs": row.runs,
+            "retries": int(row.retries),
+            "prompt_tokens": int(row.prompt_tokens),
+            "completion_tokens": int(row.completion_tokens),
+            "stages": {},
+        }
+
+    stages = (await session.exec(text(f"""
+        SELECT date_trunc('day', t.created_at)::date AS day,
+               s.key AS stage,
+               count(*) AS runs,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY s.value::float) AS p50_ms,
+               percentile_cont(0.95) WITHIN GROUP (ORDER BY s.value::float) AS p95_ms
+        FROM {table} AS t
+        CROSS JOIN LATERAL jsonb_each_text(t.stage_timings) AS s
+        WHERE t.created_at >= :since AND t.stage_timings IS NOT NULL
+        GROUP BY day, stage
+    """), params=params)).all()
+    for row in stages:
+        days.setdefault(row.day, _empty_day())["stages"][row.stage] = {
+            "runs": row.runs, "p50_ms": row.p50_ms, "p95_ms": row.p95_ms
+        }
+    return days
+
+
+async def _aggregates_python(session: AsyncSession, model, since: datetime) -> Dict[date, Dict[str, Any]]:
+    statement = select(
+        model.created_at, model.stage_timings, model.retry_count, model.prompt_tokens, model.completion_tokens
+    ).where(model.created_at >= since, model.stage_timings.is_not(None))
+
+    days: Dict[date, Dict[str, Any]] = {}
+    samples: Dict[date, Dict[str, List[float]]] = {}
+    for created_at, timings, retry_count, prompt_tokens, completion_tokens in (await session.exec(statement)).all():
+        day = created_at.date()
+        summary = days.setdefault(day, _empty_day())
+        summary["runs"] += 1
+        summary["retries"] += retry_count or 0
+        summary["prompt_tokens"] += prompt_tokens or 0
+        summary["completion_tokens"] += completion_tokens or 0
+        for stage, ms in (timings or {}).items():
+            samples.setdefault(day, {}).setdefault(stage, []).append(float(ms))
+
+    for day, stages in samples.items():
+        for stage, values in stages.items():
+            values.sort()
+            days[day]["stages"][stage] = {
+                "runs": len(values),
+                "p50_ms": _percentile(values, 0.5),
+                "p95_ms": _percentile(values, 0.95),
+            }
+    return days
+
+
+async def stage_timing_aggregates(session: AsyncSession, model, since: datetime) -> Dict[str, Any]:
+    """Per day: runs, retries, token totals and p50/p95 of every stage, for one tool table.
+
+    PostgreSQL computes the percentiles in SQL; other databases fall back to Python.
+    """
+    if session.bind.dialect.name == "postgresql":
+        days = await _aggregates_postgres(session, model, since)
+    else:
+        days = await _aggregates_python(session, model, since)
+
+    for summary in days.values():
+        summary["stages"] = {
+            stage: {"runs": values["runs"], "p50_ms": round(values["p50_ms"], 1), "p95_ms": round(values["p95_ms"], 1)}
+            for stage, values in sorted(summary["stages"].items())
+        }
+    return {day.isoformat(): days[day] for day in sorted(days)}
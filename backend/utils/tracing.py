@@ -0,0 +1,257 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from utils.logging_config import get_logger
+from utils.tool_runs import record_stage
+
+logger = get_logger(__name__)
+
+# Where finished traces go: "none", "file" (logs/traces.log) or "otlp" (OTLP/HTTP JSON)
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+OTLP_TIMEOUT = float(os.getenv("OTLP_TIMEOUT", "5"))
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "gipoly-backend")
+# Share of traces exported; Server-Timing is sent for every request regardless
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+# Spans kept per trace (a request can run many queries)
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+TRACE_EXPORT_QUEUE_SIZE = 1000
+TRACE_EXPORT_BATCH_SIZE = 50
+
+TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _span_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed stage of a request"""
+
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.span_id = _span_id()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    """Spans collected for one request"""
+
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id if trace_id and TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def add(self, span: Span):
+        if len(self.spans) < TRACE_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def start_trace(trace_id: Optional[str] = None) -> Trace:
+    """Start collecting spans for the current request"""
+    trace = Trace(trace_id)
+    _current_trace.set(trace)
+    _current_span.set(None)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span and as a stage of the current tool run"""
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        record_stage(name, current.duration_ms)
+        if trace is not None:
+            trace.add(current)
+
+
+def record_span(name: str, duration: float, **attributes):
+    """Add an already finished span that ended now and lasted `duration` seconds"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    finished = Span(name, parent.span_id if parent else None, attributes)
+    finished.end_ns = time.time_ns()
+    finished.start_ns = finished.end_ns - int(duration * 1e9)
+    trace.add(finished)
+
+
+def server_timing(trace: Trace, total: float, root: Optional[Span] = None) -> str:
+    """Server-Timing header value: summed duration per stage name plus the total"""
+    stages: Dict[str, float] = {}
+    for s in trace.spans:
+        if s is not root and s.end_ns is not None:
+            stages[s.name] = stages.get(s.name, 0.0) + s.duration_ms
+    entries = [f"{name};dur={duration:.1f}" for name, duration in stages.items()]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def _attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _otlp_span(trace: Trace, s: Span, root: Optional[Span]) -> Dict:
+    payload = {
+        "traceId": trace.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": 2 if s is root else 1,  # SERVER for the request, INTERNAL for stages
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns or time.time_ns()),
+        "attributes": [_attribute(k, v) for k, v in s.attributes.items() if v is not None],
+    }
+    if s.parent_id:
+        payload["parentSpanId"] = s.parent_id
+    if s.error:
+        payload["status"] = {"code": 2, "message": s.error}
+    return payload
+
+
+class FileSpanExporter:
+    """Write each finished trace as one JSON line to the "traces" logger"""
+
+    def __init__(self):
+        self._logger = logging.getLogger("traces")
+
+    def export(self, trace: Trace, root: Optional[Span]):
+        record = {
+            "trace_id": trace.trace_id,
+            "dropped_spans": trace.dropped,
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "start_ns": s.start_ns,
+                    "duration_ms": round(s.duration_ms, 3),
+                    "attributes": s.attributes,
+                    "error": s.error,
+                }
+                for s in trace.spans
+            ],
+        }
+        self._logger.info(json.dumps(record, default=str, separators=(",", ":")))
+
+    def shutdown(self):
+        pass
+
+
+class OTLPSpanExporter:
+    """Post batches of spans to an OTLP/HTTP collector from a background thread"""
+
+    def __init__(self, endpoint: str = OTLP_ENDPOINT):
+        self.endpoint = endpoint
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace, root: Optional[Span]):
+        try:
+            self._queue.put_nowait([_otlp_span(trace, s, root) for s in trace.spans])
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        import requests
+
+        stopping = False
+        while not stopping:
+            # Block for one trace, then take whatever else is queued (up to a batch)
+            batch = [self._queue.get()]
+            while len(batch) < TRACE_EXPORT_BATCH_SIZE and batch[-1] is not None:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+
+            spans = [s for trace_spans in batch for s in trace_spans]
+            if not spans:
+                continue
+            payload = {
+                "resourceSpans": [{
+                    "resource": {"attributes": [_attribute("service.name", TRACE_SERVICE_NAME)]},
+                    "scopeSpans": [{"scope": {"name": "gipoly"}, "spans": spans}],
+                }]
+            }
+            try:
+                requests.post(self.endpoint, json=payload, timeout=OTLP_TIMEOUT).raise_for_status()
+            except Exception as e:
+                logger.warning("Trace export to %s failed: %s", self.endpoint, e)
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join(timeout=OTLP_TIMEOUT)
+
+
+def create_exporter():
+    """Exporter for the configured TRACE_EXPORTER, or None"""
+    if TRACE_EXPORTER == "file":
+        return FileSpanExporter()
+    if TRACE_EXPORTER == "otlp":
+        logger.info("Exporting traces to %s", OTLP_ENDPOINT)
+        return OTLPSpanExporter()
+    return None
+
+
+exporter = create_exporter()
+
+
+def finish_trace(trace: Trace, root: Optional[Span] = None):
+    """Hand a finished trace to the exporter, if sampled"""
+    if exporter is not None and trace.spans and random.random() < TRACE_SAMPLE_RATE:
+        exporter.export(trace, root)
+
+
+def shutdown_tracing():
+    """Flush queued traces"""
+    if exporter is not None:
+        exporter.shutdown()